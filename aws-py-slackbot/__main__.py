@@ -11,6 +11,10 @@ import pulumi_aws as aws
 config = pulumi.Config("mentionbot")
 slack_token = config.get("slackToken")
 verification_token = config.get("verificationToken")
+# Set to DEBUG to log the full Slack payloads and responses.
+log_level = config.get("logLevel") or "INFO"
+# Set to true to have the webhook only enqueue events, and a second Lambda process them in batches.
+queue_events = config.get_bool("queueEvents") or False
 
 #  Make a simple table that keeps track of which users have requested to be notified when their name
 #  is mentioned, and which channel they'll be notified in.
@@ -26,11 +30,55 @@ subscriptions_table = aws.dynamodb.Table(
     hash_key="id",
 )
 
+lambda_environment = {
+    "SLACK_TOKEN": slack_token,
+    "SLACK_VERIFICATION_CODE": verification_token,
+    # TODO: is this "apply" necessary?
+    "SUBSCRIPTIONS_TABLE_NAME": subscriptions_table.name.apply(lambda name: name),
+    "LOG_LEVEL": log_level,
+}
+
 # Slack has strict requirements on how fast you must be when responding to their messages. In order
-# to ensure we don't respond too slowly, all we do is enqueue messages to this topic, and then
-# return immediately.
-# message_bus = aws.cloudwatch.EventBus('messages')
-# message_bus =
+# to ensure we don't respond too slowly even under bursts, all the webhook does in queue mode is
+# enqueue events to this queue, and then return immediately.
+queue_processing_timeout = 30
+if queue_events:
+    events_dead_letter_queue = aws.sqs.Queue(
+        "events-dead-letter",
+        message_retention_seconds=14 * 24 * 60 * 60,
+    )
+    events_queue = aws.sqs.Queue(
+        "events",
+        # AWS recommends at least six times the timeout of the function consuming the queue.
+        visibility_timeout_seconds=6 * queue_processing_timeout,
+        redrive_policy=pulumi.Output.json_dumps(
+            {"deadLetterTargetArn": events_dead_letter_queue.arn, "maxReceiveCount": 5}
+        ),
+    )
+    lambda_environment["EVENTS_QUEUE_URL"] = events_queue.url
+
+    queue_role_policy = aws.iam.RolePolicy(
+        "mentionbotQueueAccessPolicy",
+        role=iam.lambda_role.id,
+        policy=pulumi.Output.json_dumps(
+            {
+                "Version": "2012-10-17",
+                "Statement": [
+                    {
+                        "Action": [
+                            "sqs:SendMessage",
+                            "sqs:ReceiveMessage",
+                            "sqs:DeleteMessage",
+                            "sqs:GetQueueAttributes",
+                        ],
+                        "Effect": "Allow",
+                        "Sid": "queueAccess",
+                        "Resource": events_queue.arn,
+                    }
+                ],
+            }
+        ),
+    )
 
 ##################
 ## Lambda Function
@@ -44,6 +92,7 @@ lambda_role_policy = aws.iam.RolePolicy(
         "Statement": [{
             "Action": [
                 "dynamodb:GetItem",
+                "dynamodb:BatchGetItem",
                 "dynamodb:DeleteItem",
                 "dynamodb:PutItem",
                 "dynamodb:UpdateItem"
@@ -62,16 +111,36 @@ lambda_func = aws.lambda_.Function(
     runtime="python3.7",
     handler="mention_processing_lambda.webhook_handler",
     code=pulumi.AssetArchive({".": pulumi.FileArchive(".")}),
-    environment={
-        "variables": {
-            "SLACK_TOKEN": slack_token,
-            "SLACK_VERIFICATION_CODE": verification_token,
-            # TODO: is this "apply" necessary?
-            "SUBSCRIPTIONS_TABLE_NAME": subscriptions_table.name.apply(lambda name: name),
-        }
-    },
+    environment={"variables": lambda_environment},
 )
 
+if queue_events:
+    # Processes the queued events in batches of up to 10. It reports which events of a batch
+    # failed, so only those are retried.
+    queue_lambda_func = aws.lambda_.Function(
+        "mention-queue-lambda",
+        role=iam.lambda_role.arn,
+        runtime="python3.12",
+        handler="mention_processing_lambda.queue_handler",
+        timeout=queue_processing_timeout,
+        code=pulumi.AssetArchive({".": pulumi.FileArchive(".")}),
+        environment={
+            "variables": {
+                key: value for key, value in lambda_environment.items() if key != "EVENTS_QUEUE_URL"
+            }
+        },
+    )
+
+    events_mapping = aws.lambda_.EventSourceMapping(
+        "events-mapping",
+        event_source_arn=events_queue.arn,
+        function_name=queue_lambda_func.arn,
+        batch_size=10,
+        maximum_batching_window_in_seconds=1,
+        function_response_types=["ReportBatchItemFailures"],
+        opts=pulumi.ResourceOptions(depends_on=[queue_role_policy]),
+    )
+
 #############################################
 ## APIGateway RestAPI
 # Provide webhooks for slack to send events
@@ -0,0 +1,94 @@
+"""Run the queue mode of the mention Lambda against a local SQS and DynamoDB stand-in.
+
+Creates a queue and a subscriptions table on the stand-in, sends events through `webhook_handler`,
+and feeds what lands on the queue to `queue_handler` the way the event-source mapping does:
+in batches, deleting only the messages the handler didn't report as failed. One malformed event
+is queued as well and is expected to be reported back. No Slack calls are made, as none of the
+mentioned users are subscribed.
+
+    moto_server -p 5000 &
+    AWS_ENDPOINT_URL=http://localhost:5000 python local_queue.py
+"""
+
+import json
+import os
+import sys
+import time
+
+if not (os.environ.get("AWS_ENDPOINT_URL") or os.environ.get("AWS_ENDPOINT_URL_SQS")):
+    sys.exit("Set AWS_ENDPOINT_URL to the URL of a local AWS stand-in, e.g. moto_server.")
+
+# The stand-ins accept any credentials.
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import boto3  # noqa: E402
+
+sqs = boto3.client("sqs")
+dynamodb = boto3.client("dynamodb")
+
+suffix = str(int(time.time()))
+queue_url = sqs.create_queue(QueueName="mentionbot-events-" + suffix)["QueueUrl"]
+table_name = "mentionbot-subscriptions-" + suffix
+dynamodb.create_table(
+    TableName=table_name,
+    AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+    KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+    BillingMode="PAY_PER_REQUEST",
+)
+
+os.environ.update(
+    SLACK_TOKEN="local",
+    SLACK_VERIFICATION_CODE="local",
+    SUBSCRIPTIONS_TABLE_NAME=table_name,
+    EVENTS_QUEUE_URL=queue_url,
+)
+import mention_processing_lambda  # noqa: E402
+
+events = 25
+for i in range(events):
+    request = {
+        "type": "event_callback",
+        "token": "local",
+        "event": {
+            "type": "message",
+            "channel": "C0",
+            "event_ts": str(i),
+            "text": "<@U%d> <@U%d>" % (i, i + 1),
+        },
+    }
+    response = mention_processing_lambda.webhook_handler({"body": json.dumps(request)}, None)
+    assert response["statusCode"] == 200, response
+sqs.send_message(QueueUrl=queue_url, MessageBody=json.dumps({"malformed": True}))
+
+processed = failed = 0
+while True:
+    messages = sqs.receive_message(
+        QueueUrl=queue_url, MaxNumberOfMessages=10, WaitTimeSeconds=1, VisibilityTimeout=60
+    ).get("Messages", [])
+    if not messages:
+        break
+
+    batch = {
+        "Records": [
+            {"messageId": m["MessageId"], "receiptHandle": m["ReceiptHandle"], "body": m["Body"]}
+            for m in messages
+        ]
+    }
+    result = mention_processing_lambda.queue_handler(batch, None)
+    failures = {f["itemIdentifier"] for f in result["batchItemFailures"]}
+    failed += len(failures)
+
+    done = [m for m in messages if m["MessageId"] not in failures]
+    processed += len(done)
+    if done:
+        sqs.delete_message_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {"Id": str(i), "ReceiptHandle": m["ReceiptHandle"]} for i, m in enumerate(done)
+            ],
+        )
+
+print("%d events processed, %d reported as failed" % (processed, failed))
+sys.exit(0 if (processed, failed) == (events, 1) else 1)
@@ -1,8 +1,18 @@
+import time
+
+# Taken first, so that a cold start's metrics include the time spent importing and setting up.
+init_started = time.perf_counter()
+
 import requests
 import json
+import logging
 import os
 import re
+import threading
 import boto3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 ###################################################
 #
@@ -12,6 +22,94 @@ import boto3
 slack_token = os.environ["SLACK_TOKEN"]
 verification_token = os.environ["SLACK_VERIFICATION_CODE"]
 subscriptions_table_name = os.environ["SUBSCRIPTIONS_TABLE_NAME"]
+# When set, the webhook only enqueues events here and `queue_handler` processes them.
+events_queue_url = os.environ.get("EVENTS_QUEUE_URL")
+
+# DEBUG also logs the full Slack payloads and API responses; INFO only logs what was done.
+logger = logging.getLogger("mentionbot")
+log_level = (os.environ.get("LOG_LEVEL") or "INFO").upper()
+# setLevel raises for names it doesn't know, which would fail every cold start.
+if isinstance(logging.getLevelName(log_level), int):
+    logger.setLevel(log_level)
+else:
+    logger.setLevel(logging.INFO)
+    logger.warning("Unknown LOG_LEVEL %r, logging at INFO", log_level)
+
+# Created once per container and reused by every invocation it serves.
+dynamodb_client = boto3.client("dynamodb")
+sqs_client = boto3.client("sqs") if events_queue_url else None
+
+# One keep-alive connection pool to Slack per container, so warm invocations skip the TLS handshake.
+slack_session = requests.Session()
+slack_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=10))
+slack_session.headers["Authorization"] = "Bearer " + (slack_token or "")
+slack_timeout_seconds = 5
+slack_retries = 3
+
+# Notifications for one message are sent concurrently, over the session's connections.
+notification_workers = 8
+
+# BatchGetItem reads at most 100 keys per request.
+batch_get_limit = 100
+batch_get_retries = 8
+
+# Subscriptions read by this container are reused for this long. Subscribing or unsubscribing
+# updates the cache of the container that handled it; other containers see the change once their
+# entry expires.
+subscription_cache_ttl_seconds = float(os.environ.get("SUBSCRIPTION_CACHE_TTL_SECONDS", "60"))
+subscription_cache_size = 10000
+
+metrics_namespace = "mentionbot"
+cold_start = True
+
+
+####
+# Log how long an invocation took, and whether it was the first one in its container, as a
+# CloudWatch embedded metric. Lambda ships the line with the other logs; no API call is made.
+####
+def record_invocation(handler, started):
+    global cold_start
+    now = time.perf_counter()
+    values = {"Duration": (now - started) * 1000}
+    if cold_start:
+        values["InitDuration"] = (started - init_started) * 1000
+
+    print(
+        json.dumps(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": metrics_namespace,
+                            "Dimensions": [["Handler", "ColdStart"]],
+                            "Metrics": [{"Name": name, "Unit": "Milliseconds"} for name in values],
+                        }
+                    ],
+                },
+                "Handler": handler,
+                "ColdStart": str(cold_start).lower(),
+                **values,
+            }
+        )
+    )
+    cold_start = False
+
+
+def webhook_handler(event, context):
+    started = time.perf_counter()
+    try:
+        return handle_webhook(event)
+    finally:
+        record_invocation("webhook", started)
+
+
+def queue_handler(event, context):
+    started = time.perf_counter()
+    try:
+        return handle_queued_events(event)
+    finally:
+        record_invocation("queue", started)
 
 
 ########
@@ -19,7 +117,7 @@ subscriptions_table_name = os.environ["SUBSCRIPTIONS_TABLE_NAME"]
 #  - Initial verification of slack_token
 #  - Event callback with token verification
 ########
-def webhook_handler(event, context):
+def handle_webhook(event):
     try:
         if not slack_token:
             raise Exception("mentionbot:slack_token was not provided")
@@ -30,8 +128,7 @@ def webhook_handler(event, context):
 
         request = json.loads(event["body"])
 
-        print("Parsed request...")
-        print(request)
+        logger.debug("Parsed request: %s", request)
         if request["type"] == "url_verification":
             # url_verification is the simple message slack sends to our endpoint to
             # just make sure we're setup properly.  All we have to do is get the
@@ -42,69 +139,205 @@ def webhook_handler(event, context):
 
         elif request["type"] == "event_callback":
             if request["token"] != verification_token:
-                print("Error: Invalid verification token")
+                logger.error("Invalid verification token")
 
                 return {"statusCode": 401, "body": "Invalid verification token"}
 
+            elif events_queue_url:
+                # Acknowledge right away; `queue_handler` does the work.
+                sqs_client.send_message(
+                    QueueUrl=events_queue_url, MessageBody=json.dumps(request["event"])
+                )
+
+                return {"statusCode": 200, "body": ""}
+
             else:
                 on_event_callback(request)
 
-                return {"statusCode": 200, "body": json.dumps({"challenge": challenge})}
+                return {"statusCode": 200, "body": ""}
         else:
-            print("Unknown event type: " + request.type)
+            logger.warning("Unknown request type: %s", request["type"])
+            return {"statusCode": 200, "body": ""}
     except Exception as err:
-        print("Error processing this request")
-        print(err)
-        print(event)
+        logger.exception("Error processing this request")
+        logger.debug("Request: %s", event)
         # Fall through. Even in the event of an error, we want to return '200' so that slack
         # doesn't just repeat the message, causing the same error.
 
         # Always return success so that Slack doesn't just immediately resend this message to us.
-        return {"statusCode": 200, "body": err}
+        return {"statusCode": 200, "body": str(err)}
+
+
+#####
+# Process a batch of queued slack events. Only the events that failed are reported back, so only
+# those are delivered again; after too many attempts the queue moves them to its dead-letter queue.
+#####
+def handle_queued_events(event):
+    failures = []
+    for record in event["Records"]:
+        try:
+            on_event_callback({"event": json.loads(record["body"])})
+        except Exception:
+            logger.exception("Error processing queued event %s", record["messageId"])
+            failures.append({"itemIdentifier": record["messageId"]})
+
+    logger.info("Processed %d queued events, %d failed", len(event["Records"]), len(failures))
+    return {"batchItemFailures": failures}
 
 
 #####
 # Process a slack event
 #####
 def on_event_callback(request):
-    print("request event")
-    print(request["event"])
     event = request["event"]
+    logger.debug("Event: %s", event)
 
     if "message" == event["type"]:
-        print("event_type: message")
+        logger.info("event_type: message")
         on_message_event_callback(event)
     elif "app_mention" == event["type"]:
-        print("event_type: app_mention")
+        logger.info("event_type: app_mention")
         on_app_mention_event_callback(event)
     else:
-        print("Unknown event type: " + event["type"])
+        logger.warning("Unknown event type: %s", event["type"])
 
 
 ####
-# Notify the user that they have been mentioned
+# Hands out calls at a steady rate, allowing short bursts. Shared by all threads in the container.
 ####
-def process_match(event, match):
-    print("getting " + match + " from subscriptions table.")
-    client = boto3.client("dynamodb")
-    resp = client.get_item(TableName=subscriptions_table_name, Key={"id": {"S": match}})
+class TokenBucket:
+    def __init__(self, per_second, burst):
+        self.per_second = per_second
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.per_second
+                )
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                if wait <= 0:
+                    wait = (1 - self._tokens) / self.per_second
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every caller for `seconds`, e.g. after Slack answered with a 429."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+# Slack limits each API method separately. chat.postMessage allows about one message per second
+# per channel, with short bursts, and several hundred a minute per workspace; chat.getPermalink
+# (tier 4) about 100 calls a minute.
+slack_rate_limits = {
+    "chat.postMessage": TokenBucket(per_second=5, burst=10),
+    "chat.getPermalink": TokenBucket(per_second=1.5, burst=10),
+}
+
+notification_pool = ThreadPoolExecutor(max_workers=notification_workers)
 
-    print("Get match response")
-    print(resp)
 
-    if not resp:
-        return
+####
+# A least-recently-used cache whose entries expire after a fixed time
+####
+class TTLCache:
+    missing = object()
 
-    # print('Printing item')
-    # print(resp["Item"])
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
 
-    perma_link = get_permalink(channel=event["channel"], timestamp=event["event_ts"])
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return TTLCache.missing
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return TTLCache.missing
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
 
-    print("perma_link")
-    print(perma_link)
+
+# Maps user ids to their subscription item, or to None for users that aren't subscribed.
+subscription_cache = TTLCache(subscription_cache_size, subscription_cache_ttl_seconds)
+
+
+####
+# Look up the subscriptions of all the given users, from the cache or with as few requests as
+# possible
+####
+def get_subscriptions(user_ids):
+    subscriptions = {}
+    misses = []
+    for user_id in user_ids:
+        cached = subscription_cache.get(user_id)
+        if cached is TTLCache.missing:
+            misses.append(user_id)
+        elif cached is not None:
+            subscriptions[user_id] = cached
+    logger.info("%d subscriptions cached, %d to read", len(user_ids) - len(misses), len(misses))
+
+    subscriptions.update(read_subscriptions(misses))
+    for user_id in misses:
+        # Remember users without a subscription too; most mentioned users have none.
+        subscription_cache.put(user_id, subscriptions.get(user_id))
+    return subscriptions
+
+
+def read_subscriptions(user_ids):
+    subscriptions = {}
+    for start in range(0, len(user_ids), batch_get_limit):
+        request_items = {
+            subscriptions_table_name: {
+                "Keys": [
+                    {"id": {"S": user_id}} for user_id in user_ids[start : start + batch_get_limit]
+                ]
+            }
+        }
+        attempt = 0
+        while request_items:
+            resp = dynamodb_client.batch_get_item(RequestItems=request_items)
+            for item in resp["Responses"].get(subscriptions_table_name, []):
+                subscriptions[item["id"]["S"]] = item
+
+            # Keys DynamoDB didn't get to, e.g. when throttled, have to be requested again.
+            request_items = resp.get("UnprocessedKeys")
+            if request_items:
+                attempt += 1
+                if attempt > batch_get_retries:
+                    raise Exception("Subscriptions still unprocessed after retrying")
+                time.sleep(min(0.05 * 2**attempt, 2))
+
+    return subscriptions
+
+
+####
+# Notify the user that they have been mentioned
+####
+def process_match(match, subscription, perma_link):
+    logger.info("Notifying %s", match)
 
     message = "New mention at " + perma_link
-    send_channel_message(resp["Item"]["channel"], message)
+    send_channel_message(subscription["channel"]["S"], message)
 
 
 ######
@@ -112,25 +345,69 @@ def process_match(event, match):
 ######
 def on_message_event_callback(event):
     if not event["text"]:
-        print("No text in message.")
+        logger.info("No text in message.")
         # No text for the message, so nothing to do.
         return
 
-    print(event["text"])
+    logger.debug("Text: %s", event["text"])
     # find all values that match the shape <@ **** >
     search = re.compile(r"<@(.*?)>")
     matches = search.findall(event["text"])
 
     if not matches:
-        print("No matches found")
+        logger.info("No matches found")
         # No @mentions in the message, so nothing to do.
         return
 
     # There might be multiple @mentions to the same person in the same message.
     # So make into a set to make things unique.
-    for match in list(set(matches)):
-        print("Process match " + match)
-        process_match(event=event, match=match)
+    subscriptions = get_subscriptions(set(matches))
+    logger.info("%d mentions, %d subscribed", len(set(matches)), len(subscriptions))
+
+    if not subscriptions:
+        return
+
+    # All mentions in a message link to the same place.
+    perma_link = get_permalink(channel=event["channel"], timestamp=event["event_ts"])
+
+    # Only users that subscribed get notified. Wait for every notification: the container may
+    # be frozen as soon as the handler returns.
+    futures = {
+        match: notification_pool.submit(
+            process_match, match=match, subscription=subscription, perma_link=perma_link
+        )
+        for match, subscription in subscriptions.items()
+    }
+    for match, future in futures.items():
+        try:
+            future.result()
+        except Exception:
+            logger.exception("Failed to notify %s", match)
+
+
+####
+# Call a Slack API method within its rate limit, retrying when Slack asks us to back off
+####
+def call_slack(method, http_method="POST", **kwargs):
+    bucket = slack_rate_limits[method]
+    for attempt in range(slack_retries + 1):
+        bucket.acquire()
+        r = slack_session.request(
+            http_method,
+            "https://slack.com/api/" + method,
+            timeout=slack_timeout_seconds,
+            **kwargs,
+        )
+        if r.status_code != 429:
+            resp = r.json()
+            logger.debug("%s response: %s", method, resp)
+            return resp
+
+        retry_after = float(r.headers.get("Retry-After", "1"))
+        logger.warning("%s rate limited, retrying in %ss", method, retry_after)
+        bucket.pause(retry_after)
+
+    raise Exception(method + " still rate limited after " + str(slack_retries) + " retries")
 
 
 ####
@@ -139,50 +416,29 @@ def on_message_event_callback(event):
 def send_channel_message(channel, text):
     message = {"channel": channel, "text": text}
 
-    print("Sending channel message")
-    print(message)
-
-    r = requests.post(
-        "https://slack.com/api/chat.postMessage?",
-        data=json.dumps(message),
-        headers={
-            "Authorization": "Bearer " + slack_token,
-            "Content-Type": "application/json",
-        },
-    )
+    logger.debug("Sending channel message: %s", message)
 
-    resp = r.json()
-    print("Send message response")
-    print(resp)
+    resp = call_slack("chat.postMessage", json=message)
+    if not resp.get("ok"):
+        logger.error("chat.postMessage to %s failed: %s", channel, resp.get("error"))
 
 
 ######
 # Get permanent link to the message
 ######
 def get_permalink(channel, timestamp):
-    print("Getting permalink")
-
-    url = "https://slack.com/api/chat.getPermalink?channel=" + channel + "&message_ts=" + timestamp
-
-    print(url)
-
-    r = requests.get(
-        "https://slack.com/api/chat.getPermalink?channel=" + channel + "&message_ts=" + timestamp,
-        headers={"Authorization": "Bearer " + slack_token},
+    resp = call_slack(
+        "chat.getPermalink", "GET", params={"channel": channel, "message_ts": timestamp}
     )
-
-    print("After get permalink ")
-    print("request ", r)
-    print("permalink response", r.json())
-    return r.json()["permalink"]
+    return resp["permalink"]
 
 
 def on_app_mention_event_callback(event):
     if "unsubscribe" in event["text"].lower():
-        print("Unsubscribing user")
+        logger.info("Unsubscribing user")
         unsubscribe_from_mentions(event)
     else:
-        print("Subscribing user")
+        logger.info("Subscribing user")
         subscribe_to_mentions(event)
 
 
@@ -190,8 +446,10 @@ def on_app_mention_event_callback(event):
 # Unsubscribe user by deleting record from dynamo table
 ####
 def unsubscribe_from_mentions(event):
-    client = boto3.client("dynamodb")
-    client.delete_item(TableName=subscriptions_table_name, Key={"id": {"S": event["user"]}})
+    dynamodb_client.delete_item(
+        TableName=subscriptions_table_name, Key={"id": {"S": event["user"]}}
+    )
+    subscription_cache.put(event["user"], None)
     text = (
         "Hi <@"
         + event["user"]
@@ -204,23 +462,18 @@ def unsubscribe_from_mentions(event):
 # Subscribe user by adding record to dynamo table
 ####
 def subscribe_to_mentions(event):
-    channel = event["channel"]
-    print(channel)
-    dynamodb_client = boto3.client("dynamodb")
-    dynamodb_client.put_item(
-        TableName=subscriptions_table_name,
-        Item={
-            "id": {
-                "S": event["user"],
-            },
-            "channel": {"S": event["channel"]},
+    item = {
+        "id": {
+            "S": event["user"],
         },
-    )
+        "channel": {"S": event["channel"]},
+    }
+    dynamodb_client.put_item(TableName=subscriptions_table_name, Item=item)
+    subscription_cache.put(event["user"], item)
     text = (
         "Hi <@"
         + event["user"]
         + ">. You've been subscribed to @ mentions. Send me a message containing 'unsubscribe' to stop receiving those notifications."
     )
 
-    print(text)
     send_channel_message(event["channel"], text)
@@ -7,11 +7,58 @@ config = pulumi.Config()
 
 resource_count = config.require_int("resource_count")
 resource_payload_bytes = config.require_int("resource_payload_bytes")
+# Optional shape parameters, swept by matrix.py. All of them default to the original flat loop.
+topology = config.get("topology") or "flat"
+nesting_depth = config.get_int("nesting_depth") or 0
+output_dependencies = config.get_int("output_dependencies") or 0
 
-for i in range(0, resource_count):
-    deadweight = "{:08}".format(i) * int(resource_payload_bytes / 8)
-    dummy = Dummy(f"dummy-{i}", deadweight=deadweight)
-    if i == 0:
-        pulumi.export("ResourcePayloadBytes", dummy.deadweight.apply(lambda s: len(s)))
 
+def payload(i):
+    return "{:08}".format(i) * int(resource_payload_bytes / 8)
+
+
+if topology == "flat":
+    dummies = []
+    for i in range(0, resource_count):
+        deadweight = payload(i)
+
+        # Make the payload wait on the outputs of the resources registered just before this one.
+        # `deadweight` is a plain string, so it is their anchors' outputs that carry the edges.
+        deps = dummies[max(0, i - output_dependencies) :] if output_dependencies else []
+        if deps:
+            deadweight = pulumi.Output.all(*[d.ready for d in deps]).apply(
+                lambda _, w=deadweight: w
+            )
+
+        # Nest the resource under a chain of empty parent components.
+        parent = None
+        for level in range(0, nesting_depth):
+            parent = Dummy(
+                f"dummy-{i}-level-{level}",
+                deadweight="",
+                opts=pulumi.ResourceOptions(parent=parent),
+            )
+
+        dummies.append(
+            Dummy(
+                f"dummy-{i}",
+                deadweight=deadweight,
+                opts=pulumi.ResourceOptions(parent=parent),
+                anchored=output_dependencies > 0,
+            )
+        )
+else:
+    import topologies
+
+    dummies = topologies.build(
+        topology,
+        resource_count,
+        payload,
+        edge_kind=config.get("edge_kind") or "depends_on",
+        edge_density=config.get_float("edge_density") or 0.01,
+        seed=config.get_int("seed") or 0,
+    )
+
+if dummies:
+    pulumi.export("ResourcePayloadBytes", dummies[0].deadweight.apply(lambda s: len(s)))
 pulumi.export("ResourceCount", resource_count)
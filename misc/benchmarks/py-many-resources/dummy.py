@@ -1,10 +1,46 @@
 import pulumi
+from pulumi.dynamic import CreateResult, ResourceProvider
+from pulumi.dynamic.dynamic import PROVIDER_KEY, serialize_provider
 
 
 class Dummy(pulumi.ComponentResource):
 
-    def __init__(self, name, deadweight, opts=None):
+    def __init__(self, name, deadweight, opts=None, anchored=False):
         super().__init__("examples:dummy:Dummy", name, {"deadweight": deadweight}, opts)
 
         self.deadweight = pulumi.Output.from_input(deadweight)
+        if anchored:
+            # Depending on a component means depending on its custom resources, so a `Dummy`
+            # without one adds no edge to the graph the engine sees.
+            self.anchor = Anchor(f"{name}-anchor", opts=pulumi.ResourceOptions(parent=self))
+            # An Output that carries the anchor, for payloads that should wait on this resource.
+            self.ready = self.anchor.id
         self.register_outputs({"deadweight": self.deadweight})
+
+
+class AnchorProvider(ResourceProvider):
+    serialize_as_secret_always = False
+
+    def create(self, props):
+        return CreateResult(id_="anchor", outs={})
+
+
+_serialized_provider = None
+
+
+class Anchor(pulumi.CustomResource):
+    """
+    A dynamic resource that creates nothing. It needs no provider plugin beyond the Python language
+    host's own dynamic provider.
+
+    `pulumi.dynamic.Resource` pickles its provider for every resource, which would cost more than
+    the rest of the program; the provider is pickled once and shared by every anchor instead.
+    """
+
+    def __init__(self, name, opts=None):
+        global _serialized_provider
+        if _serialized_provider is None:
+            _serialized_provider = serialize_provider(AnchorProvider())
+        super().__init__(
+            "pulumi-python:dynamic:Resource", name, {PROVIDER_KEY: _serialized_provider}, opts
+        )
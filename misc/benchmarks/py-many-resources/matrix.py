@@ -0,0 +1,222 @@
+"""Sweep the py-many-resources benchmark over a matrix of program shapes.
+
+Every cell of the matrix is one run of this program with a given resource count, payload size,
+nesting depth and number of Output dependencies per resource. Cells for the other topologies in
+`topologies.py` sweep the edge kind (and, for `random`, the edge density) instead of the nesting
+depth and Output dependencies. The wall time, CPU time and peak RSS of the run are written to one
+JSON file per cell.
+
+In `engine` mode (the default) each cell is a `pulumi up`, and the stack is destroyed before the
+next cell runs. In `mock` mode each cell runs `mock_run.py`, which only measures the Python SDK.
+
+    python matrix.py --stack bench --resource-counts 1000,5000 --nesting-depths 0,4
+    python matrix.py --mode mock --resource-counts 1000,5000 --nesting-depths 0,4
+    python matrix.py --mode mock --topologies chain,fan_out,diamond,random --edge-kinds apply,parent
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The program's defaults for the optional config keys a cell may leave out.
+CONFIG_DEFAULTS = {
+    "nesting_depth": 0,
+    "output_dependencies": 0,
+    "topology": "flat",
+    "edge_kind": "depends_on",
+    "edge_density": 0.01,
+    "seed": 0,
+}
+
+
+def parse_ints(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def parse_floats(value):
+    return [float(v) for v in value.split(",") if v]
+
+
+def parse_strs(value):
+    return [v for v in value.split(",") if v]
+
+
+def cell_name(cell):
+    if "topology" not in cell:
+        return "r{resource_count}-p{resource_payload_bytes}-d{nesting_depth}-o{output_dependencies}".format(
+            **cell
+        )
+    name = "{topology}-{edge_kind}-r{resource_count}-p{resource_payload_bytes}".format(**cell)
+    if "edge_density" in cell:
+        name += "-e{edge_density}".format(**cell)
+    return name
+
+
+def cells(args):
+    for topology in args.topologies:
+        if topology == "flat":
+            for count, payload, depth, deps in itertools.product(
+                args.resource_counts,
+                args.payload_bytes,
+                args.nesting_depths,
+                args.output_dependencies,
+            ):
+                yield {
+                    "resource_count": count,
+                    "resource_payload_bytes": payload,
+                    "nesting_depth": depth,
+                    "output_dependencies": deps,
+                }
+            continue
+
+        densities = args.edge_densities if topology == "random" else [None]
+        for count, payload, kind, density in itertools.product(
+            args.resource_counts, args.payload_bytes, args.edge_kinds, densities
+        ):
+            cell = {
+                "topology": topology,
+                "resource_count": count,
+                "resource_payload_bytes": payload,
+                "edge_kind": kind,
+            }
+            if density is not None:
+                cell["edge_density"] = density
+            yield cell
+
+
+def total_resources(cell):
+    """The number of resources a cell registers, not counting the stack and its providers."""
+    count = cell["resource_count"]
+    if "topology" in cell:
+        # Every resource of the other topologies is anchored.
+        return 2 * count
+    total = count * (cell["nesting_depth"] + 1)
+    if cell["output_dependencies"] > 0:
+        total += count  # one anchor per top-level resource
+    return total
+
+
+def run_measured(cmd, log):
+    """Run `cmd` to completion and return its exit code along with its resource usage.
+
+    The usage comes from wait4(2), so it covers the child and every descendant it waited for; for
+    `pulumi up` that includes the language host and the Python program.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=HERE, stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    peak_rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return proc.returncode, {
+        "wall_seconds": wall,
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        "user_seconds": usage.ru_utime,
+        "system_seconds": usage.ru_stime,
+        "peak_rss_bytes": peak_rss,
+    }
+
+
+def engine_command(cell):
+    cmd = ["pulumi", "up", "--yes", "--skip-preview", "--non-interactive"]
+    # `--config` saves the values into the stack's config file, so every key is passed: one left
+    # out would keep the value an earlier cell (or an earlier run) set.
+    for key, value in {**CONFIG_DEFAULTS, **cell}.items():
+        cmd += ["--config", f"{key}={value}"]
+    return cmd
+
+
+def mock_command(cell, timings_path, memory_checkpoints=None):
+    cmd = [sys.executable, os.path.join(HERE, "mock_run.py"), "--out", timings_path]
+    if memory_checkpoints:
+        cmd += ["--memory-checkpoints", ",".join(str(n) for n in memory_checkpoints)]
+    for key, value in cell.items():
+        cmd += ["--config", f"{key}={value}"]
+    return cmd
+
+
+def run_cell(cell, mode, out_dir, memory_checkpoints=None):
+    name = cell_name(cell)
+    extra = {}
+    with open(os.path.join(out_dir, f"{name}.log"), "w") as log:
+        if mode == "mock":
+            timings_path = os.path.join(out_dir, f"{name}.mock.json")
+            exit_code, usage = run_measured(
+                mock_command(cell, timings_path, memory_checkpoints), log
+            )
+            if exit_code == 0:
+                with open(timings_path) as fp:
+                    extra["sdk"] = json.load(fp)
+                os.remove(timings_path)
+        else:
+            exit_code, usage = run_measured(engine_command(cell), log)
+            subprocess.run(
+                ["pulumi", "destroy", "--yes", "--skip-preview", "--non-interactive"],
+                cwd=HERE,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+    result = {
+        "cell": cell,
+        "mode": mode,
+        "total_resources": total_resources(cell),
+        "exit_code": exit_code,
+        **usage,
+        **extra,
+    }
+    with open(os.path.join(out_dir, f"{name}.json"), "w") as fp:
+        json.dump(result, fp, indent=2)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["engine", "mock"], default="engine")
+    parser.add_argument("--stack", help="stack to deploy every cell into (engine mode only)")
+    parser.add_argument("--resource-counts", type=parse_ints, default=[1000, 5000, 20000])
+    parser.add_argument("--payload-bytes", type=parse_ints, default=[8, 1024])
+    parser.add_argument("--nesting-depths", type=parse_ints, default=[0, 4])
+    parser.add_argument("--output-dependencies", type=parse_ints, default=[0, 4])
+    parser.add_argument("--topologies", type=parse_strs, default=["flat"])
+    parser.add_argument("--edge-kinds", type=parse_strs, default=["depends_on"])
+    parser.add_argument("--edge-densities", type=parse_floats, default=[0.001, 0.01])
+    parser.add_argument("--out-dir", default=os.path.join(HERE, "results"))
+    parser.add_argument(
+        "--memory-checkpoints",
+        type=parse_ints,
+        help="mock mode only: take tracemalloc snapshots after this many registrations",
+    )
+    args = parser.parse_args(argv)
+    if args.mode == "engine" and not args.stack:
+        parser.error("--stack is required in engine mode")
+    if args.mode == "engine" and args.memory_checkpoints:
+        parser.error("--memory-checkpoints is only supported in mock mode")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.mode == "engine":
+        subprocess.run(["pulumi", "stack", "select", "--create", args.stack], cwd=HERE, check=True)
+
+    failed = False
+    for cell in cells(args):
+        result = run_cell(cell, args.mode, args.out_dir, args.memory_checkpoints)
+        failed = failed or result["exit_code"] != 0
+        print(
+            f"{cell_name(cell)}: {result['wall_seconds']:.1f}s wall, "
+            f"{result['cpu_seconds']:.1f}s cpu, {result['peak_rss_bytes'] / 2**20:.0f} MiB peak RSS"
+            + ("" if result["exit_code"] == 0 else f" (exit code {result['exit_code']})")
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Opt-in memory accounting for the py-many-resources benchmark under mocks.
+
+`MemoryProfiler` traces allocations with `tracemalloc` and takes a snapshot every time the number
+of registered resources reaches one of its checkpoints, plus a final one once the program has
+finished. Each checkpoint reports the memory retained since the run started, divided by the number
+of registered resources and by the number of live `Output` objects, along with the allocation
+sites that grew the most.
+"""
+
+import gc
+import os
+import tracemalloc
+
+import pulumi
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class MemoryProfiler:
+    def __init__(self, checkpoints, top=10, frames=1):
+        self.checkpoints = set(checkpoints)
+        self.top = top
+        self.frames = frames
+        self.registered = 0
+        self.results = []
+        self.baseline = None
+        self.baseline_bytes = 0
+
+    def start(self):
+        tracemalloc.start(self.frames)
+        gc.collect()
+        self.baseline = self.snapshot()
+        self.baseline_bytes = sum(stat.size for stat in self.baseline.statistics("filename"))
+
+    def stop(self):
+        tracemalloc.stop()
+
+    def snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+
+    def on_register(self):
+        self.registered += 1
+        if self.registered in self.checkpoints:
+            self.checkpoint(f"registered-{self.registered}")
+
+    def checkpoint(self, label):
+        # Registrations run on the SDK's worker threads and keep going while the snapshot is
+        # taken, so the figures are approximate for checkpoints taken mid-run.
+        registered = self.registered
+        gc.collect()
+        snapshot = self.snapshot()
+        outputs = sum(1 for obj in gc.get_objects() if isinstance(obj, pulumi.Output))
+
+        by_file = snapshot.statistics("filename")
+        retained = sum(stat.size for stat in by_file) - self.baseline_bytes
+        # Allocations made by the benchmark program itself (e.g. `deadweight` payloads), as
+        # opposed to the SDK's own bookkeeping.
+        program = sum(stat.size for stat in by_file if stat.traceback[0].filename.startswith(HERE))
+
+        self.results.append(
+            {
+                "label": label,
+                "registered_resources": registered,
+                "live_outputs": outputs,
+                "retained_bytes": retained,
+                "program_bytes": program,
+                "bytes_per_resource": retained / registered if registered else None,
+                "bytes_per_output": retained / outputs if outputs else None,
+                "top_sites": [
+                    {
+                        "site": str(stat.traceback[0]),
+                        "size_diff_bytes": stat.size_diff,
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in snapshot.compare_to(self.baseline, "lineno")[: self.top]
+                ],
+            }
+        )
+
+
+class ProfilingMocks(pulumi.runtime.Mocks):
+    """Forwards to `inner` and tells the profiler about every registered resource."""
+
+    def __init__(self, inner, profiler):
+        self.inner = inner
+        self.profiler = profiler
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        result = self.inner.new_resource(args)
+        self.profiler.on_register()
+        return result
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        return self.inner.call(args)
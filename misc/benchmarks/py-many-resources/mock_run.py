@@ -0,0 +1,110 @@
+"""Run the py-many-resources program in-process under `pulumi.runtime.Mocks`.
+
+No engine, provider or cloud is involved, so the timings only cover the Python SDK: resource
+registration, Output resolution and serialization of `deadweight`.
+
+    python mock_run.py --config resource_count=5000 --config resource_payload_bytes=1024
+"""
+
+import argparse
+import json
+import os
+import runpy
+import sys
+import time
+
+import pulumi
+
+from memory import MemoryProfiler, ProfilingMocks
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PROJECT = "py-many-resources"
+
+
+class DummyMocks(pulumi.runtime.Mocks):
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        return [args.name + "_id", args.inputs]
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        return {}
+
+
+def parse_config(pairs):
+    config = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        config[key] = value
+    return config
+
+
+def run(config, mocks=None, profiler=None):
+    """Run `__main__.py` once under mocks and return how long each phase took.
+
+    `program_seconds` covers executing the program body, which constructs every resource;
+    `total_seconds` also includes draining the outstanding registrations and Output resolutions.
+    With a `MemoryProfiler`, its checkpoints are added under `memory`; tracing allocations slows
+    the run down, so the timings of such a run are not comparable with the others.
+    """
+    mocks = mocks or DummyMocks()
+    if profiler:
+        mocks = ProfilingMocks(mocks, profiler)
+    pulumi.runtime.set_mocks(mocks, project=PROJECT, stack="mock")
+    for key, value in config.items():
+        pulumi.runtime.set_config(f"{PROJECT}:{key}", str(value))
+
+    # The program imports its neighbours (e.g. `dummy`) the same way it does under `pulumi up`.
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+
+    timings = {}
+    # Keep the program's globals alive until the end, as they would be under `pulumi up`, so the
+    # final memory checkpoint sees everything the program still holds on to.
+    namespace = {}
+
+    @pulumi.runtime.test
+    def program():
+        start = time.perf_counter()
+        namespace.update(runpy.run_path(os.path.join(HERE, "__main__.py")))
+        timings["program_seconds"] = time.perf_counter() - start
+
+    if profiler:
+        profiler.start()
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    program()
+    timings["total_seconds"] = time.perf_counter() - start_wall
+    timings["cpu_seconds"] = time.process_time() - start_cpu
+    timings["registered_resources"] = len(pulumi.runtime.settings.get_monitor().resources)
+    if profiler:
+        profiler.checkpoint("end")
+        profiler.stop()
+        timings["memory"] = profiler.results
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--out", help="write the timings to this file instead of stdout")
+    parser.add_argument(
+        "--memory-checkpoints",
+        metavar="N,N,...",
+        help="trace allocations and take a snapshot after each of these many registrations",
+    )
+    parser.add_argument("--memory-top", type=int, default=10, help="allocation sites to report")
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.memory_checkpoints:
+        checkpoints = [int(n) for n in args.memory_checkpoints.split(",") if n]
+        profiler = MemoryProfiler(checkpoints, top=args.memory_top)
+
+    timings = run(parse_config(args.config), profiler=profiler)
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump(timings, fp, indent=2)
+    else:
+        print(json.dumps(timings, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Dependency topologies of `Dummy` resources for the py-many-resources benchmark.
+
+Every generator registers `count` resources and wires them together with one kind of edge:
+
+* `depends_on` - an explicit `ResourceOptions.depends_on`.
+* `parent` - a `ResourceOptions.parent`. A resource has a single parent, so any further upstream
+  resources feed its payload through `Output.all` instead. (Adding them to `depends_on` would
+  create cycles whenever one of them is also an ancestor, since depending on a component means
+  depending on all of its children.)
+* `apply` - the payload is an Output derived from the upstream resources, with `Output.apply` for a
+  single upstream resource and `Output.all` for several.
+
+Every resource is anchored (see `dummy.Anchor`), so that each of these edges reaches the engine:
+`depends_on` expands to the upstream anchors, and derived payloads wait on the anchors' ids.
+"""
+
+import math
+import random
+
+import pulumi
+
+from dummy import Dummy
+
+EDGE_KINDS = ("depends_on", "parent", "apply")
+
+
+def derived_payload(deadweight, upstream):
+    if len(upstream) == 1:
+        return upstream[0].ready.apply(lambda _, w=deadweight: w)
+    return pulumi.Output.all(*[u.ready for u in upstream]).apply(lambda _, w=deadweight: w)
+
+
+def new_dummy(name, deadweight, upstream, edge_kind):
+    if not upstream:
+        return Dummy(name, deadweight=deadweight, anchored=True)
+
+    if edge_kind == "depends_on":
+        return Dummy(
+            name,
+            deadweight=deadweight,
+            opts=pulumi.ResourceOptions(depends_on=upstream),
+            anchored=True,
+        )
+
+    if edge_kind == "parent":
+        if len(upstream) > 1:
+            deadweight = derived_payload(deadweight, upstream[1:])
+        return Dummy(
+            name,
+            deadweight=deadweight,
+            opts=pulumi.ResourceOptions(parent=upstream[0]),
+            anchored=True,
+        )
+
+    if edge_kind == "apply":
+        return Dummy(name, deadweight=derived_payload(deadweight, upstream), anchored=True)
+
+    raise ValueError(f"unknown edge kind {edge_kind!r}, expected one of {EDGE_KINDS}")
+
+
+def chain(count, payload, edge_kind, **_):
+    """dummy-0 <- dummy-1 <- ... <- dummy-(count-1)"""
+    resources = []
+    for i in range(0, count):
+        resources.append(new_dummy(f"dummy-{i}", payload(i), resources[-1:], edge_kind))
+    return resources
+
+
+def fan_out(count, payload, edge_kind, **_):
+    """One root that every other resource depends on."""
+    root = new_dummy("dummy-0", payload(0), [], edge_kind)
+    resources = [root]
+    for i in range(1, count):
+        resources.append(new_dummy(f"dummy-{i}", payload(i), [root], edge_kind))
+    return resources
+
+
+def diamond(count, payload, edge_kind, **_):
+    """One root, `count - 2` resources that depend on it, and a sink that depends on all of them."""
+    root = new_dummy("dummy-0", payload(0), [], edge_kind)
+    middle = [new_dummy(f"dummy-{i}", payload(i), [root], edge_kind) for i in range(1, count - 1)]
+    resources = [root] + middle
+    if count > 1:
+        resources.append(new_dummy(f"dummy-{count - 1}", payload(count - 1), middle, edge_kind))
+    return resources
+
+
+def random_dag(count, payload, edge_kind, edge_density=0.01, seed=0, **_):
+    """Every earlier resource is an upstream of a later one with probability `edge_density`."""
+    rng = random.Random(seed)
+    resources = []
+    for i in range(0, count):
+        upstream = sample(rng, resources, edge_density)
+        resources.append(new_dummy(f"dummy-{i}", payload(i), upstream, edge_kind))
+    return resources
+
+
+def sample(rng, items, probability):
+    """Pick each of `items` independently with `probability`, in time proportional to the picks.
+
+    Draws the gap to the next pick from a geometric distribution rather than flipping a coin per
+    item, so dense graphs of 20k resources don't cost 200M random numbers.
+    """
+    if probability <= 0:
+        return []
+    if probability >= 1:
+        return list(items)
+    picked = []
+    log_q = math.log(1.0 - probability)
+    j = -1
+    while True:
+        j += 1 + int(math.log(1.0 - rng.random()) / log_q)
+        if j >= len(items):
+            return picked
+        picked.append(items[j])
+
+
+TOPOLOGIES = {
+    "chain": chain,
+    "fan_out": fan_out,
+    "diamond": diamond,
+    "random": random_dag,
+}
+
+
+def build(topology, count, payload, edge_kind="depends_on", **kwargs):
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"unknown topology {topology!r}, expected one of {sorted(TOPOLOGIES)}")
+    if edge_kind not in EDGE_KINDS:
+        raise ValueError(f"unknown edge kind {edge_kind!r}, expected one of {EDGE_KINDS}")
+    return TOPOLOGIES[topology](count, payload, edge_kind, **kwargs)
@@ -0,0 +1,70 @@
+"""Benchmark the Python policy packs in `policy-packs/` against synthetic stacks.
+
+Python counterpart of `misc/benchmarks/policy-pack`. Every `*-python` policy pack is loaded and its
+resource policies are run over every resource of a synthetic stack, and its stack policies over
+the whole stack, once per scale. The latency of each policy and the total per pack are reported.
+
+    python bench.py --scales 1000,10000,100000
+"""
+
+import argparse
+import json
+import time
+
+from packs import POLICY_PACKS_DIR, load_all, resource_args, evaluate
+from synthetic import synthetic_stack
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000,100000", help="comma-separated sizes")
+    parser.add_argument("--packs", help="comma-separated policy pack directories, e.g. aws-python")
+    parser.add_argument("--root", default=POLICY_PACKS_DIR)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    packs = load_all(args.root, args.packs.split(",") if args.packs else None)
+    results = []
+
+    print(
+        f"{'resources':>9}  {'pack':<24} {'policy':<32} "
+        f"{'calls':>7} {'total ms':>9} {'us/call':>8} {'violations':>10}"
+    )
+    for scale in [int(s) for s in args.scales.split(",") if s]:
+        resources = synthetic_stack(scale, args.seed)
+        validation_args = [resource_args(r) for r in resources]
+
+        for pack in packs:
+            start = time.perf_counter()
+            timings = evaluate(pack, resources, validation_args)
+            pack_seconds = time.perf_counter() - start
+
+            for t in timings:
+                print(
+                    f"{scale:>9}  {pack.label:<24} {t.policy:<32} {t.calls:>7} "
+                    f"{t.seconds * 1000:>9.2f} {t.seconds / t.calls * 1e6:>8.2f} "
+                    f"{len(t.violations):>10}"
+                )
+                results.append(
+                    {
+                        "resources": scale,
+                        "pack": pack.label,
+                        "policy": t.policy,
+                        "calls": t.calls,
+                        "seconds": t.seconds,
+                        "violations": len(t.violations),
+                    }
+                )
+            print(
+                f"{scale:>9}  {pack.label:<24} {'(total)':<32} {'':>7} {pack_seconds * 1000:>9.2f}"
+            )
+            results.append({"resources": scale, "pack": pack.label, "seconds": pack_seconds})
+
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Evaluate the Python policy packs against exported stacks, without the Pulumi engine.
+
+Takes one or more `pulumi stack export` files and runs every `*-python` policy pack in
+`policy-packs/` over each of them. Resource policies see each resource's inputs and stack policies
+see the outputs of the whole stack, as they would during an update. Each stack's resources are
+split into shards that are validated in parallel by a pool of worker processes; the stack policies
+of each stack run as one more task in the same pool.
+
+One JSON line with the violations and per-policy timings is written per stack:
+
+    pulumi stack export --show-secrets --file prod.json
+    python offline.py prod.json snapshots/*.json --out results.jsonl
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+from packs import (
+    POLICY_PACKS_DIR,
+    evaluate_resources,
+    evaluate_stack,
+    export_policy_resources,
+    export_validation_args,
+    load_all,
+    load_stack_export,
+)
+
+# The policy packs loaded in each worker process.
+_packs = None
+
+
+def _load_packs(root, names):
+    global _packs
+    _packs = load_all(root, names)
+
+
+def _validate_resources(records):
+    args = export_validation_args(records)
+    return [t for pack in _packs for t in evaluate_resources(pack, args)]
+
+
+def _validate_stack(records):
+    resources = export_policy_resources(records)
+    return [t for pack in _packs for t in evaluate_stack(pack, resources)]
+
+
+def _shards(records, shard_size):
+    return [records[i : i + shard_size] for i in range(0, len(records), shard_size)]
+
+
+def _merge(timings):
+    """Combine the timings that the shards of one stack report for the same policy."""
+    merged = {}
+    for t in timings:
+        entry = merged.setdefault(
+            (t.pack, t.policy),
+            {
+                "pack": t.pack,
+                "policy": t.policy,
+                "enforcement_level": t.enforcement_level,
+                "calls": 0,
+                "seconds": 0.0,
+                "violations": [],
+            },
+        )
+        entry["calls"] += t.calls
+        entry["seconds"] += t.seconds
+        entry["violations"] += [{"urn": urn, "message": msg} for urn, msg in t.violations]
+    return list(merged.values())
+
+
+def _report(stack, out):
+    """Wait for one stack's results and write them; returns (failed, mandatory violations)."""
+    path, count, start, futures = stack
+    try:
+        policies = _merge(t for f in futures for t in f.result())
+        error = None
+    except Exception as e:  # noqa: BLE001 reported per stack
+        policies, error = [], f"{type(e).__name__}: {e}"
+
+    result = {
+        "export": path,
+        "resources": count,
+        # Includes the time spent waiting for the stacks queued before this one.
+        "elapsed_seconds": time.perf_counter() - start,
+        "policies": policies,
+    }
+    if error:
+        result["error"] = error
+    out.write(json.dumps(result) + "\n")
+
+    violations = sum(len(p["violations"]) for p in policies)
+    mandatory = sum(len(p["violations"]) for p in policies if p["enforcement_level"] == "mandatory")
+    print(
+        f"{path}: {count} resources, {violations} violations ({mandatory} mandatory)"
+        + (f", {error}" if error else ""),
+        file=sys.stderr,
+    )
+    return error is not None, mandatory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("exports", nargs="+", help="`pulumi stack export` files")
+    parser.add_argument("--packs", help="comma-separated policy pack directories, e.g. aws-python")
+    parser.add_argument("--root", default=POLICY_PACKS_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=2000, help="resources per task")
+    parser.add_argument(
+        "--stacks-in-flight",
+        type=int,
+        default=4,
+        help="stacks loaded and queued at once; bounds the memory held by this process",
+    )
+    parser.add_argument("--out", help="write the JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    names = args.packs.split(",") if args.packs else None
+    out = open(args.out, "w") if args.out else sys.stdout
+    mandatory_violations = 0
+    errors = 0
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_load_packs, initargs=(args.root, names)
+    ) as pool:
+        # Keep a few stacks queued so the pool stays busy across stacks, but load the next export
+        # only once the oldest one has been reported, so that memory doesn't grow with the number
+        # of exports.
+        pending = collections.deque()
+        for path in args.exports:
+            if len(pending) >= max(1, args.stacks_in_flight):
+                failed, mandatory = _report(pending.popleft(), out)
+                errors += failed
+                mandatory_violations += mandatory
+
+            start = time.perf_counter()
+            try:
+                records = load_stack_export(path)
+            except (OSError, ValueError, KeyError) as e:
+                # Reported in order with the other stacks.
+                failed = concurrent.futures.Future()
+                failed.set_exception(e)
+                pending.append((path, 0, start, [failed]))
+                continue
+            futures = [
+                pool.submit(_validate_resources, s) for s in _shards(records, args.shard_size)
+            ]
+            futures.append(pool.submit(_validate_stack, records))
+            pending.append((path, len(records), start, futures))
+            del records
+
+        while pending:
+            failed, mandatory = _report(pending.popleft(), out)
+            errors += failed
+            mandatory_violations += mandatory
+
+    if out is not sys.stdout:
+        out.close()
+    return 1 if mandatory_violations or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
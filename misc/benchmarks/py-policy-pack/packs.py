@@ -0,0 +1,314 @@
+"""Load the Python policy packs in `policy-packs/` and evaluate them outside of the Pulumi engine.
+
+A policy pack's `__main__.py` ends by constructing a `PolicyPack`, which starts the analyzer's gRPC
+server and blocks. `load_policy_pack` runs the file with `PolicyPack` swapped for a class that only
+records its arguments, so the policies can be called directly.
+"""
+
+import asyncio
+import contextlib
+import glob
+import inspect
+import json
+import os
+import runpy
+import sys
+import time
+
+import pulumi_policy
+from pulumi_policy import (
+    EnforcementLevel,
+    PolicyCustomTimeouts,
+    PolicyProviderResource,
+    PolicyResource,
+    PolicyResourceOptions,
+    ResourceValidationArgs,
+    ResourceValidationPolicy,
+    StackValidationArgs,
+    StackValidationPolicy,
+)
+from pulumi_policy.proxy import unknown_checking_proxy
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+POLICY_PACKS_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "..", "policy-packs"))
+
+
+class LoadedPolicyPack:
+    """The arguments a policy pack passed to `PolicyPack`."""
+
+    def __init__(self, name, policies, enforcement_level=None, **kwargs):
+        self.name = name
+        self.policies = policies
+        self.enforcement_level = enforcement_level
+        self.path = None
+
+    @property
+    def label(self):
+        """The pack's directory name; several example packs share the same `name`."""
+        return os.path.basename(self.path) if self.path else self.name
+
+    @property
+    def resource_policies(self):
+        return [p for p in self.policies if isinstance(p, ResourceValidationPolicy)]
+
+    @property
+    def stack_policies(self):
+        return [p for p in self.policies if isinstance(p, StackValidationPolicy)]
+
+    def enforcement_of(self, policy):
+        return policy.enforcement_level or self.enforcement_level or EnforcementLevel.ADVISORY
+
+
+@contextlib.contextmanager
+def _capture_policy_packs(captured):
+    def capture(*args, **kwargs):
+        captured.append(LoadedPolicyPack(*args, **kwargs))
+
+    original = pulumi_policy.PolicyPack
+    pulumi_policy.PolicyPack = capture
+    try:
+        yield
+    finally:
+        pulumi_policy.PolicyPack = original
+
+
+def load_policy_pack(pack_dir):
+    captured = []
+    sys.path.insert(0, pack_dir)
+    try:
+        with _capture_policy_packs(captured):
+            runpy.run_path(os.path.join(pack_dir, "__main__.py"), run_name="__main__")
+    finally:
+        sys.path.remove(pack_dir)
+        # Packs ship their own copies of helper modules such as `validation_cache`; forget them
+        # so the next pack imports its own instead of reusing this one's.
+        for name, module in list(sys.modules.items()):
+            if os.path.dirname(getattr(module, "__file__", None) or "") == pack_dir:
+                del sys.modules[name]
+    if len(captured) != 1:
+        raise ValueError(f"{pack_dir} defined {len(captured)} policy packs, expected 1")
+    captured[0].path = pack_dir
+    return captured[0]
+
+
+def python_pack_dirs(root=POLICY_PACKS_DIR):
+    return sorted(
+        d for d in glob.glob(os.path.join(root, "*-python")) if os.path.isfile(f"{d}/__main__.py")
+    )
+
+
+def load_all(root=POLICY_PACKS_DIR, names=None):
+    dirs = python_pack_dirs(root)
+    if names:
+        dirs = [d for d in dirs if os.path.basename(d) in names]
+    return [load_policy_pack(d) for d in dirs]
+
+
+def default_options():
+    return PolicyResourceOptions(
+        protect=False,
+        ignore_changes=[],
+        delete_before_replace=None,
+        aliases=[],
+        custom_timeouts=PolicyCustomTimeouts(0, 0, 0),
+        additional_secret_outputs=[],
+    )
+
+
+def resource_args(resource):
+    """Build the `ResourceValidationArgs` for a `PolicyResource`."""
+    return ResourceValidationArgs(
+        resource.resource_type,
+        # Like the analyzer, which hands policies their props behind a proxy that raises on
+        # unknown values. Wrapping props that already are a proxy returns them as they are.
+        unknown_checking_proxy(resource.props),
+        resource.urn,
+        resource.name,
+        resource.opts,
+        resource.provider,
+    )
+
+
+def new_resource(resource_type, name, props, project="bench", stack="bench"):
+    urn = f"urn:pulumi:{stack}::{project}::{resource_type}::{name}"
+    return PolicyResource(
+        resource_type,
+        unknown_checking_proxy(props),
+        urn,
+        name,
+        default_options(),
+        None,
+        None,
+        [],
+        {},
+    )
+
+
+# Marks a secret value in a stack export; `pulumi stack export --show-secrets` adds its plaintext.
+SECRET_SIG = "4dabf18193072939515e22adb298388d"
+
+
+def _unwrap_secrets(value):
+    if isinstance(value, dict):
+        if value.get(SECRET_SIG) == "1b47061264138c4ac30d75fd1eb44270" and "plaintext" in value:
+            return _unwrap_secrets(json.loads(value["plaintext"]))
+        return {k: _unwrap_secrets(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_unwrap_secrets(v) for v in value]
+    return value
+
+
+def load_stack_export(path):
+    """Read the resources of a `pulumi stack export` file as plain, picklable dicts."""
+    with open(path) as fp:
+        export = json.load(fp)
+    deployment = export.get("deployment", export)
+    return [
+        {
+            "urn": r["urn"],
+            "type": r["type"],
+            "name": r["urn"].rsplit("::", 1)[-1],
+            "inputs": _unwrap_secrets(r.get("inputs") or {}),
+            "outputs": _unwrap_secrets(r.get("outputs") or {}),
+            "parent": r.get("parent"),
+            "provider": r.get("provider"),
+            "dependencies": r.get("dependencies") or [],
+            "property_dependencies": r.get("propertyDependencies") or {},
+            "protect": r.get("protect", False),
+        }
+        for r in deployment.get("resources") or []
+    ]
+
+
+def _providers(records):
+    """Map provider references (`<urn>::<id>`) to `PolicyProviderResource`s."""
+    by_urn = {r["urn"]: r for r in records if r["type"].startswith("pulumi:providers:")}
+    providers = {}
+    for record in records:
+        ref = record["provider"]
+        if ref and ref not in providers:
+            provider = by_urn.get(ref.rsplit("::", 1)[0])
+            providers[ref] = provider and PolicyProviderResource(
+                provider["type"], provider["inputs"], provider["urn"], provider["name"]
+            )
+    return providers
+
+
+def _options(record):
+    opts = default_options()
+    opts.protect = record["protect"]
+    opts.parent = record["parent"]
+    return opts
+
+
+def export_validation_args(records):
+    """`ResourceValidationArgs` for exported resources. Resource policies see their inputs."""
+    providers = _providers(records)
+    return [
+        ResourceValidationArgs(
+            r["type"],
+            unknown_checking_proxy(r["inputs"]),
+            r["urn"],
+            r["name"],
+            _options(r),
+            providers.get(r["provider"]),
+        )
+        for r in records
+    ]
+
+
+def export_policy_resources(records):
+    """Linked `PolicyResource`s for exported resources. Stack policies see their outputs."""
+    providers = _providers(records)
+    resources = {
+        r["urn"]: PolicyResource(
+            r["type"],
+            unknown_checking_proxy(r["outputs"]),
+            r["urn"],
+            r["name"],
+            _options(r),
+            providers.get(r["provider"]),
+            None,
+            [],
+            {},
+        )
+        for r in records
+    }
+    for record in records:
+        resource = resources[record["urn"]]
+        resource.parent = resources.get(record["parent"])
+        resource.dependencies = [resources[d] for d in record["dependencies"] if d in resources]
+        resource.property_dependencies = {
+            k: [resources[d] for d in deps if d in resources]
+            for k, deps in record["property_dependencies"].items()
+        }
+    return list(resources.values())
+
+
+def _complete(result):
+    if inspect.isawaitable(result):
+        asyncio.run(_await(result))
+
+
+async def _await(result):
+    await result
+
+
+class PolicyTiming:
+    def __init__(self, pack, policy, enforcement_level=None):
+        self.pack = pack
+        self.policy = policy
+        self.enforcement_level = enforcement_level
+        self.calls = 0
+        self.seconds = 0.0
+        self.violations = []
+
+
+def evaluate(pack, resources, args=None):
+    """Run every policy in `pack` over `resources` and return one `PolicyTiming` per policy.
+
+    `args` optionally holds the `ResourceValidationArgs` for `resources`, built ahead of time so
+    that building them isn't counted against the policies.
+    """
+    args = args if args is not None else [resource_args(r) for r in resources]
+    return evaluate_resources(pack, args) + evaluate_stack(pack, resources)
+
+
+def evaluate_resources(pack, args):
+    """Run the resource policies in `pack` over every `ResourceValidationArgs` in `args`."""
+    timings = []
+    for policy in pack.resource_policies:
+        if pack.enforcement_of(policy) == EnforcementLevel.DISABLED:
+            continue
+        timing = PolicyTiming(pack.label, policy.name, pack.enforcement_of(policy).value)
+        for resource_arg in args:
+
+            def report_violation(message, urn=None, urn_=resource_arg.urn):
+                timing.violations.append((urn_, message))
+
+            start = time.perf_counter()
+            _complete(policy.validate(resource_arg, report_violation))
+            timing.seconds += time.perf_counter() - start
+            timing.calls += 1
+        timings.append(timing)
+    return timings
+
+
+def evaluate_stack(pack, resources):
+    """Run the stack policies in `pack` over the `PolicyResource`s of one stack."""
+    timings = []
+    for policy in pack.stack_policies:
+        if pack.enforcement_of(policy) == EnforcementLevel.DISABLED:
+            continue
+        timing = PolicyTiming(pack.label, policy.name, pack.enforcement_of(policy).value)
+
+        def report_violation(message, urn=None):
+            timing.violations.append((urn, message))
+
+        start = time.perf_counter()
+        _complete(policy.validate(StackValidationArgs(resources), report_violation))
+        timing.seconds += time.perf_counter() - start
+        timing.calls += 1
+        timings.append(timing)
+
+    return timings
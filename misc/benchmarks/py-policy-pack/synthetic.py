@@ -0,0 +1,101 @@
+"""Synthetic stacks for the Python policy-pack benchmark.
+
+Resources are drawn from a fixed mix of types: the ones the policies in `policy-packs/*-python`
+inspect, with a share of compliant and non-compliant property values, and a majority of unrelated
+types, as in a real stack.
+"""
+
+import random
+
+from packs import new_resource
+
+REGIONS = ["us-west-1", "us-west-2", "us-east-1", "eu-west-1"]
+
+
+def s3_bucket(rng, i):
+    return {
+        "bucket": f"bucket-{i}",
+        "acl": rng.choice(["private", "private", "private", "public-read", "public-read-write"]),
+        "region": rng.choice(REGIONS),
+        "tags": {"Name": f"bucket-{i}", "team": "bench"},
+    }
+
+
+def azure_container(rng, i):
+    return {
+        "name": f"container-{i}",
+        "storageAccountName": "benchaccount",
+        "containerAccessType": rng.choice(["private", "private", "blob", "container"]),
+    }
+
+
+def gcp_bucket_acl(rng, i):
+    return {
+        "bucket": f"bucket-{i}",
+        "predefinedAcl": rng.choice(["private", "projectPrivate", "public-read"]),
+    }
+
+
+def k8s_service(rng, i):
+    return {
+        "metadata": {"name": f"svc-{i}", "labels": {"app": f"app-{i % 50}"}},
+        "spec": {
+            "type": rng.choice(["ClusterIP", "ClusterIP", "NodePort", "LoadBalancer"]),
+            "selector": {"app": f"app-{i % 50}"},
+            "ports": [{"port": 80, "targetPort": 8080, "protocol": "TCP"}],
+        },
+    }
+
+
+def ec2_instance(rng, i):
+    return {
+        "ami": "ami-0eb1f3cdeeb8eed2a",
+        "instanceType": rng.choice(["t3.micro", "t3.small", "m5.large"]),
+        "tags": {"Name": f"instance-{i}"},
+        "vpcSecurityGroupIds": [f"sg-{i % 20}"],
+    }
+
+
+def security_group(rng, i):
+    return {
+        "ingress": [
+            {"protocol": "tcp", "fromPort": 80, "toPort": 80, "cidrBlocks": ["0.0.0.0/0"]},
+        ],
+        "tags": {"Name": f"sg-{i}"},
+    }
+
+
+def k8s_deployment(rng, i):
+    return {
+        "metadata": {"name": f"app-{i}"},
+        "spec": {
+            "replicas": rng.randint(1, 5),
+            "selector": {"matchLabels": {"app": f"app-{i}"}},
+            "template": {
+                "metadata": {"labels": {"app": f"app-{i}"}},
+                "spec": {"containers": [{"name": "app", "image": "nginx:1.27"}]},
+            },
+        },
+    }
+
+
+# (resource type, weight, props generator)
+RESOURCE_MIX = [
+    ("aws:s3/bucket:Bucket", 10, s3_bucket),
+    ("azure:storage/container:Container", 10, azure_container),
+    ("gcp:storage/bucketACL:BucketACL", 10, gcp_bucket_acl),
+    ("kubernetes:core/v1:Service", 10, k8s_service),
+    ("aws:ec2/instance:Instance", 20, ec2_instance),
+    ("aws:ec2/securityGroup:SecurityGroup", 20, security_group),
+    ("kubernetes:apps/v1:Deployment", 20, k8s_deployment),
+]
+
+
+def synthetic_stack(count, seed=0):
+    """Return `count` `PolicyResource`s drawn from `RESOURCE_MIX`."""
+    rng = random.Random(seed)
+    kinds = rng.choices(RESOURCE_MIX, weights=[w for _, w, _ in RESOURCE_MIX], k=count)
+    return [
+        new_resource(resource_type, f"res-{i}", make_props(rng, i))
+        for i, (resource_type, _, make_props) in enumerate(kinds)
+    ]
@@ -0,0 +1,143 @@
+"""Profile the startup and import cost of every Python example.
+
+Each program runs under generic mocks (see `misc/scripts/mocked_program.py`) in its own
+`python -X importtime` process. The import times recorded after the program starts are attributed
+to that example; the harness's own imports (including `pulumi` itself) are reported separately.
+
+    python startup.py
+    python startup.py --lazy-imports --examples azure-py-virtual-data-center,aws-py-eks
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, "..", "..", ".."))
+MOCKED_PROGRAM = os.path.join(REPO_ROOT, "misc", "scripts", "mocked_program.py")
+
+sys.path.insert(0, os.path.dirname(MOCKED_PROGRAM))
+from mocked_program import PROGRAM_START_MARKER, discover_programs  # noqa: E402
+
+
+def parse_importtime(stderr):
+    """Split `-X importtime` output into (harness, program) lists of (module, self_us, cumulative_us)."""
+    harness, program = [], []
+    current = harness
+    for line in stderr.splitlines():
+        if line.startswith(PROGRAM_START_MARKER):
+            current = program
+            continue
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|", 2)
+        current.append((module.strip(), int(self_us), int(cumulative_us)))
+    return harness, program
+
+
+def profile(program_dir, lazy_imports):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "result.json")
+        cmd = [
+            sys.executable,
+            "-X",
+            "importtime",
+            MOCKED_PROGRAM,
+            program_dir,
+            "--mark-start",
+            "--out",
+            out,
+        ]
+        if lazy_imports:
+            cmd.append("--lazy-imports")
+
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        wall = time.perf_counter() - start
+
+        result = {"program": program_dir, "ok": False, "error": proc.stderr.strip()[-500:]}
+        if os.path.exists(out):
+            with open(out) as fp:
+                result = json.load(fp)
+
+    harness, imports = parse_importtime(proc.stderr)
+    result.pop("traceback", None)
+    result["example"] = os.path.relpath(program_dir, REPO_ROOT)
+    result["process_seconds"] = wall
+    result["harness_import_us"] = sum(self_us for _, self_us, _ in harness)
+    result["import_us"] = sum(self_us for _, self_us, _ in imports)
+    result["imports"] = imports
+    return result
+
+
+def module_table(results):
+    """Aggregate per-module import cost across examples, most expensive first."""
+    totals = collections.defaultdict(lambda: {"self_us": 0, "cumulative_us": 0, "examples": 0})
+    for result in results:
+        for module, self_us, cumulative_us in result["imports"]:
+            entry = totals[module]
+            entry["self_us"] += self_us
+            entry["cumulative_us"] += cumulative_us
+            entry["examples"] += 1
+    return sorted(totals.items(), key=lambda item: item[1]["self_us"], reverse=True)
+
+
+def print_report(results, top):
+    print(f"{'example':<50} {'imports ms':>11} {'run s':>7} {'process s':>10}  status")
+    for result in sorted(results, key=lambda r: r["import_us"], reverse=True):
+        status = "ok" if result.get("ok") else result.get("error", "failed").splitlines()[0][:60]
+        print(
+            f"{result['example']:<50} {result['import_us'] / 1000:>11.1f} "
+            f"{result.get('seconds', 0):>7.2f} {result['process_seconds']:>10.2f}  {status}"
+        )
+
+    print()
+    print(f"{'module':<60} {'self ms':>9} {'cumulative ms':>14} {'examples':>9}")
+    for module, entry in module_table(results)[:top]:
+        print(
+            f"{module:<60} {entry['self_us'] / 1000:>9.1f} "
+            f"{entry['cumulative_us'] / 1000:>14.1f} {entry['examples']:>9}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=REPO_ROOT, help="directory to search for programs")
+    parser.add_argument("--examples", help="comma-separated example directories to profile")
+    parser.add_argument(
+        "--lazy-imports",
+        action="store_true",
+        help="defer provider SDK submodule imports until first use",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="programs to profile in parallel; more than 1 makes the timings noisier",
+    )
+    parser.add_argument("--top", type=int, default=30, help="modules to list in the module table")
+    parser.add_argument("--out", help="also write the raw results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.examples:
+        programs = [os.path.join(args.root, e) for e in args.examples.split(",") if e]
+    else:
+        programs = discover_programs(args.root)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(lambda p: profile(p, args.lazy_imports), programs))
+
+    print_report(results, args.top)
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump({"lazy_imports": args.lazy_imports, "results": results}, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
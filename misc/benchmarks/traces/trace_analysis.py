@@ -0,0 +1,361 @@
+"""Analyze the traces recorded by the performance tests in `misc/test/performance_test.go`.
+
+The tests run each example with tracing enabled and write the traces to `PULUMI_TRACING_DIR`, where
+`traces.ComputeMetrics` converts them into CSV files. This reads the ones with one span per row,
+matching their columns loosely (see `COLUMNS`), as their layout isn't pinned down. For every trace
+this reports the critical path (the chain of spans that bounds the run's duration), how the time
+splits between the language host, the engine and the providers, and the latency of provider
+operations per resource type. Two runs can be compared to flag regressions:
+
+    python trace_analysis.py summary ./traces-main
+    python trace_analysis.py compare ./traces-main ./traces-branch --threshold 0.2
+"""
+
+import argparse
+import collections
+import csv
+import datetime
+import glob
+import json
+import os
+import re
+import statistics
+import sys
+
+# Column names accepted for each span field, compared case-insensitively and ignoring `_`.
+COLUMNS = {
+    "id": ("spanid", "id", "span"),
+    "parent": ("parentspanid", "parentid", "parent"),
+    "name": ("name", "spanname", "operation", "operationname"),
+    "start": ("start", "starttime", "timestamp"),
+    "end": ("end", "endtime", "finish"),
+    "duration": ("duration",),
+}
+
+URN = re.compile(r"urn:pulumi:[^\s,;\"']+")
+GO_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ns|us|µs|ms|s|m|h)")
+GO_UNITS = {"ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 1e-3, "s": 1.0, "m": 60.0, "h": 3600.0}
+PROVIDER_OPS = ("Check", "Diff", "Create", "Read", "Update", "Delete", "Invoke", "Construct")
+
+CATEGORIES = ("language", "engine", "provider")
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "start", "end", "tags", "children")
+
+    def __init__(self, id_, parent, name, start, end, tags):
+        self.id = id_
+        self.parent = parent
+        self.name = name
+        self.start = start
+        self.end = end
+        self.tags = tags
+        self.children = []
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    @property
+    def category(self):
+        """Which process the span's own time was spent in."""
+        if "ResourceProvider/" in self.name:
+            return "provider"
+        if "LanguageRuntime/" in self.name:
+            return "language"
+        return "engine"
+
+    @property
+    def resource_type(self):
+        """The type of the resource the span is about, from the first URN in its tags."""
+        for value in self.tags.values():
+            match = URN.search(value)
+            if match:
+                qualified_type = match.group().split("::")[2]
+                return qualified_type.split("$")[-1]
+        return None
+
+    @property
+    def operation(self):
+        """The provider operation, e.g. `Create`, or None for other spans."""
+        if self.category != "provider":
+            return None
+        method = self.name.rsplit("/", 1)[-1]
+        return method if method in PROVIDER_OPS else None
+
+
+def parse_seconds(value):
+    """A Go duration (`1m2.5s`, `300ms`) or a plain number of seconds."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = GO_DURATION.findall(value)
+    if not parts:
+        raise ValueError(f"not a duration: {value!r}")
+    return sum(float(n) * GO_UNITS[unit] for n, unit in parts)
+
+
+def parse_time(value):
+    """Seconds since the epoch, from an epoch number, RFC 3339 or Go's `time.Time.String()`."""
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        pass
+    else:
+        # Epoch seconds, milliseconds, microseconds or nanoseconds.
+        while number > 1e11:
+            number /= 1000
+        return number
+    value = value.split(" m=")[0]  # Go's monotonic clock reading
+    value = re.sub(r" [A-Z]{2,5}$", "", value)  # Go's zone abbreviation
+    value = value.replace("Z", "+00:00").replace(" +", "+").replace(" -", "-")
+    # Python only parses up to microseconds.
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value)
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def _columns(header):
+    normalized = {h.lower().replace("_", "").replace(" ", ""): h for h in header}
+    found = {}
+    for field, names in COLUMNS.items():
+        for name in names:
+            if name in normalized:
+                found[field] = normalized[name]
+                break
+    missing = {"id", "name", "start"} - found.keys()
+    if missing or not ({"end", "duration"} & found.keys()):
+        raise ValueError(f"no {', '.join(sorted(missing)) or 'end or duration'} column in {header}")
+    return found
+
+
+def load_spans(path):
+    """Load the spans of one trace CSV and link them into trees; returns the root spans."""
+    with open(path, newline="") as fp:
+        reader = csv.DictReader(fp)
+        columns = _columns(reader.fieldnames or [])
+        span_columns = set(columns.values())
+        spans = {}
+        for row in reader:
+            start = parse_time(row[columns["start"]])
+            if "end" in columns and row[columns["end"]]:
+                end = parse_time(row[columns["end"]])
+            else:
+                end = start + parse_seconds(row[columns["duration"]])
+            span = Span(
+                row[columns["id"]],
+                row.get(columns.get("parent"), "") or "",
+                row[columns["name"]],
+                start,
+                end,
+                {k: v for k, v in row.items() if k not in span_columns and v},
+            )
+            spans[span.id] = span
+
+    roots = []
+    for span in spans.values():
+        parent = spans.get(span.parent)
+        if parent is None or parent is span:
+            roots.append(span)
+        else:
+            parent.children.append(span)
+    return roots
+
+
+def self_time(span):
+    """The span's duration minus the time covered by its children."""
+    covered = 0.0
+    cursor = span.start
+    for child in sorted(span.children, key=lambda c: c.start):
+        start, end = max(child.start, cursor), min(child.end, span.end)
+        if end > start:
+            covered += end - start
+            cursor = end
+    return span.duration - covered
+
+
+def walk(roots):
+    stack = list(roots)
+    while stack:
+        span = stack.pop()
+        yield span
+        stack.extend(span.children)
+
+
+def critical_path(roots):
+    """From the longest root, repeatedly follow the child that finishes last."""
+    if not roots:
+        return []
+    span = max(roots, key=lambda s: s.duration)
+    path = [span]
+    while span.children:
+        span = max(span.children, key=lambda c: c.end)
+        path.append(span)
+    return path
+
+
+def summarize(roots):
+    categories = dict.fromkeys(CATEGORIES, 0.0)
+    operations = collections.defaultdict(list)
+    spans = 0
+    for span in walk(roots):
+        spans += 1
+        categories[span.category] += self_time(span)
+        if span.operation:
+            operations[(span.resource_type or "(unknown)", span.operation)].append(span.duration)
+
+    path = critical_path(roots)
+    return {
+        "spans": spans,
+        "wall_seconds": max((r.end for r in roots), default=0)
+        - min((r.start for r in roots), default=0),
+        "categories": categories,
+        "critical_path": [
+            {"name": s.name, "seconds": s.duration, "self_seconds": self_time(s)} for s in path
+        ],
+        "operations": {
+            f"{type_} {op}": {
+                "count": len(durations),
+                "mean_seconds": statistics.mean(durations),
+                "p50_seconds": statistics.median(durations),
+                "max_seconds": max(durations),
+            }
+            for (type_, op), durations in sorted(operations.items())
+        },
+    }
+
+
+def trace_files(path):
+    if os.path.isfile(path):
+        return [path]
+    files = sorted(glob.glob(os.path.join(path, "**", "*.csv"), recursive=True))
+    # Skip files that aren't span tables, such as the metrics computed from them.
+    usable = []
+    for file in files:
+        with open(file, newline="") as fp:
+            try:
+                _columns(next(csv.reader(fp), []))
+            except ValueError:
+                continue
+        usable.append(file)
+    return usable
+
+
+def load_run(path):
+    """Summaries of every trace in a run, keyed by the trace's path relative to the run."""
+    base = path if os.path.isdir(path) else os.path.dirname(path)
+    return {os.path.relpath(f, base): summarize(load_spans(f)) for f in trace_files(path)}
+
+
+def metrics(summary):
+    """The numbers compared between runs, flattened."""
+    flat = {"wall": summary["wall_seconds"]}
+    for category, seconds in summary["categories"].items():
+        flat[f"{category} time"] = seconds
+    flat["critical path"] = sum(s["self_seconds"] for s in summary["critical_path"])
+    for op, stats in summary["operations"].items():
+        flat[f"{op} (mean)"] = stats["mean_seconds"]
+    return flat
+
+
+def compare(base_run, new_run, threshold, min_seconds):
+    """Metrics of traces present in both runs that changed by more than `threshold`."""
+    changes = []
+    for trace in sorted(base_run.keys() & new_run.keys()):
+        before, after = metrics(base_run[trace]), metrics(new_run[trace])
+        for name in sorted(before.keys() & after.keys()):
+            old, new = before[name], after[name]
+            if abs(new - old) < min_seconds:
+                continue
+            # A metric that was zero has no relative change; it is reported with `change` None,
+            # which JSON writes as null.
+            ratio = (new - old) / old if old else None
+            if ratio is None or abs(ratio) > threshold:
+                changes.append(
+                    {
+                        "trace": trace,
+                        "metric": name,
+                        "before": old,
+                        "after": new,
+                        "change": ratio,
+                        "regression": new > old,
+                    }
+                )
+    return changes
+
+
+def print_summary(trace, summary, top):
+    total = sum(summary["categories"].values()) or 1
+    split = ", ".join(f"{c} {s:.2f}s ({s / total:.0%})" for c, s in summary["categories"].items())
+    print(f"{trace}: {summary['spans']} spans, {summary['wall_seconds']:.2f}s")
+    print(f"  time: {split}")
+    print("  critical path:")
+    for step in summary["critical_path"][:top]:
+        print(f"    {step['seconds']:>9.3f}s  (self {step['self_seconds']:.3f}s)  {step['name']}")
+    if summary["operations"]:
+        print(f"  {'provider operation':<60} {'count':>6} {'mean s':>8} {'p50 s':>8} {'max s':>8}")
+        slowest = sorted(
+            summary["operations"].items(), key=lambda item: item[1]["mean_seconds"], reverse=True
+        )
+        for op, stats in slowest[:top]:
+            print(
+                f"  {op:<60} {stats['count']:>6} {stats['mean_seconds']:>8.3f} "
+                f"{stats['p50_seconds']:>8.3f} {stats['max_seconds']:>8.3f}"
+            )
+    print()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = ap.add_subparsers(dest="command", required=True)
+
+    summary = commands.add_parser("summary", help="summarize the traces of one run")
+    summary.add_argument("run", help="a tracing directory or a single trace CSV")
+    summary.add_argument("--top", type=int, default=15, help="rows to list per table")
+    summary.add_argument("--json", action="store_true", help="print the summaries as JSON")
+
+    diff = commands.add_parser("compare", help="compare two runs and flag regressions")
+    diff.add_argument("base")
+    diff.add_argument("new")
+    diff.add_argument(
+        "--threshold", type=float, default=0.1, help="relative change to report (0.1 = 10%%)"
+    )
+    diff.add_argument(
+        "--min-seconds", type=float, default=0.05, help="ignore changes smaller than this"
+    )
+    diff.add_argument("--json", action="store_true", help="print the changes as JSON")
+
+    args = ap.parse_args(argv)
+    if args.command == "summary":
+        run = load_run(args.run)
+        if args.json:
+            print(json.dumps(run, indent=2))
+        else:
+            for trace, result in run.items():
+                print_summary(trace, result, args.top)
+        return 0
+
+    base_run, new_run = load_run(args.base), load_run(args.new)
+    for trace in sorted(base_run.keys() ^ new_run.keys()):
+        print(f"{trace}: only in {'base' if trace in base_run else 'new'} run", file=sys.stderr)
+    changes = compare(base_run, new_run, args.threshold, args.min_seconds)
+    if args.json:
+        print(json.dumps(changes, indent=2))
+    else:
+        unbounded = float("inf")
+        for c in sorted(
+            changes, key=lambda c: unbounded if c["change"] is None else c["change"], reverse=True
+        ):
+            flag = "REGRESSION" if c["regression"] else "improvement"
+            change = "was 0" if c["change"] is None else f"{c['change']:+.0%}"
+            print(
+                f"{flag:<11} {c['trace']:<40} {c['metric']:<60} "
+                f"{c['before']:>8.3f}s -> {c['after']:>8.3f}s ({change})"
+            )
+    return 1 if any(c["regression"] for c in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Run a Python Pulumi program in-process under generic mocks.
+
+Every resource echoes its inputs back as its outputs and every invoke returns an empty result. The
+program runs in preview mode, so outputs that the mocks don't provide stay unknown and the `apply`
+callbacks that depend on them are skipped, the same way they are during `pulumi preview`.
+
+    python mocked_program.py ../../aws-py-s3-folder
+"""
+
+import argparse
+import importlib.abc
+import importlib.util
+import json
+import os
+import runpy
+import sys
+import time
+import traceback
+
+import pulumi
+import yaml
+
+# Written to stderr right before the program starts when `--mark-start` is passed, so `-X importtime`
+# output can be split into the harness's own imports and the program's.
+PROGRAM_START_MARKER = "mocked_program: program start"
+
+SKIP_DIRS = {".git", "node_modules", "venv", ".venv", "__pycache__"}
+
+
+def load_project(program_dir):
+    with open(os.path.join(program_dir, "Pulumi.yaml")) as fp:
+        return yaml.safe_load(fp) or {}
+
+
+def is_python_project(project):
+    runtime = project.get("runtime")
+    if isinstance(runtime, dict):
+        runtime = runtime.get("name")
+    return runtime == "python"
+
+
+def discover_programs(root):
+    """Find every directory under `root` with a Python `Pulumi.yaml` and a `__main__.py`."""
+    programs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        if "Pulumi.yaml" in filenames and "__main__.py" in filenames:
+            if is_python_project(load_project(dirpath)):
+                programs.append(dirpath)
+    return programs
+
+
+def project_config(project):
+    """Return the defaults declared in the `config` block of `Pulumi.yaml`, fully qualified."""
+    config = {}
+    for key, value in (project.get("config") or {}).items():
+        if isinstance(value, dict):
+            if "default" not in value:
+                continue
+            value = value["default"]
+        if ":" not in key:
+            key = f"{project['name']}:{key}"
+        config[key] = value if isinstance(value, str) else json.dumps(value)
+    return config
+
+
+class GenericMocks(pulumi.runtime.Mocks):
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        return [args.name + "_id", args.inputs]
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        return {}
+
+
+class LazySubmoduleFinder(importlib.abc.MetaPathFinder):
+    """Defer executing provider SDK submodules until one of their attributes is first used.
+
+    `from pulumi_azure_native import network` normally runs all of `network` right away; with this
+    finder installed it only binds a placeholder module, which is executed on first attribute
+    access. Top-level packages are left alone, since the provider SDKs already load their own
+    submodules lazily.
+    """
+
+    def __init__(self, prefixes=("pulumi_",)):
+        self.prefixes = tuple(prefixes)
+
+    def find_spec(self, fullname, path, target=None):
+        if "." not in fullname or not fullname.startswith(self.prefixes):
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = importlib.util.LazyLoader(spec.loader)
+                return spec
+        return None
+
+
+def run(program_dir, config=None, mocks=None, lazy_imports=False, monitor=None, mark_start=False):
+    """Run the program in `program_dir` once and return a summary of the run.
+
+    `config` is applied on top of the defaults from `Pulumi.yaml`; keys without a namespace belong
+    to the project. `monitor` replaces the mock monitor, e.g. to record what the program registers.
+    `mark_start` writes `PROGRAM_START_MARKER` to stderr right before the program runs.
+    """
+    program_dir = os.path.abspath(program_dir)
+    project = load_project(program_dir)
+    result = {"program": program_dir, "project": project.get("name")}
+
+    if lazy_imports:
+        sys.meta_path.insert(0, LazySubmoduleFinder())
+
+    pulumi.runtime.set_mocks(
+        mocks or GenericMocks(),
+        project=project.get("name"),
+        stack="mock",
+        preview=True,
+        monitor=monitor,
+    )
+    for key, value in project_config(project).items():
+        pulumi.runtime.set_config(key, value)
+    for key, value in (config or {}).items():
+        if ":" not in key:
+            key = f"{project.get('name')}:{key}"
+        pulumi.runtime.set_config(key, value)
+
+    # Programs import their neighbours and open files relative to their own directory.
+    sys.path.insert(0, program_dir)
+    os.chdir(program_dir)
+
+    @pulumi.runtime.test
+    def program():
+        runpy.run_path(os.path.join(program_dir, "__main__.py"), run_name="__main__")
+
+    if mark_start:
+        print(PROGRAM_START_MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    try:
+        program()
+        result["ok"] = True
+    except Exception as e:  # noqa: BLE001 reported to the caller instead
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - start
+    result["resources"] = len(pulumi.runtime.settings.get_monitor().resources)
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run a Python Pulumi program under generic mocks.")
+    ap.add_argument("program_dir")
+    ap.add_argument("--config", action="append", default=[], metavar="KEY=VALUE")
+    ap.add_argument(
+        "--lazy-imports",
+        action="store_true",
+        help="defer provider SDK submodule imports until first use",
+    )
+    ap.add_argument(
+        "--mark-start",
+        action="store_true",
+        help="write a marker line to stderr right before the program starts",
+    )
+    ap.add_argument("--out", help="write the summary to this file instead of stdout")
+    args = ap.parse_args(argv)
+    # `run` changes into the program's directory.
+    out = os.path.abspath(args.out) if args.out else None
+
+    config = dict(pair.partition("=")[::2] for pair in args.config)
+    result = run(
+        args.program_dir,
+        config=config,
+        lazy_imports=args.lazy_imports,
+        mark_start=args.mark_start,
+    )
+    if out:
+        with open(out, "w") as fp:
+            json.dump(result, fp, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
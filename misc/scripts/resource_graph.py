@@ -0,0 +1,236 @@
+"""
+Dump the resource graph a Python Pulumi program registers under mocks, and analyze it.
+
+`dump` runs a program with `mocked_program.py` and writes every registered resource with its type,
+parent, dependencies and the serialized size of its inputs to a compact columnar file. `analyze`
+reads such a file and reports the structure that bounds how fast the program can deploy: how deep
+the parent tree is, the longest chain of dependencies (the critical path, which the engine can't
+parallelize), the resources most others depend on and the largest inputs.
+
+    python resource_graph.py dump ../../aws-py-eks --out eks.graph.json.gz
+    python resource_graph.py analyze eks.graph.json.gz
+
+Any test that uses mocks can write the same file by passing a `GraphRecorder` as the monitor:
+
+    recorder = GraphRecorder(MyMocks())
+    pulumi.runtime.set_mocks(MyMocks(), monitor=recorder)
+    ...
+    recorder.graph().write("graph.json.gz")
+"""
+
+import argparse
+import collections
+import gzip
+import json
+import os
+import sys
+import threading
+
+from pulumi.runtime.mocks import MockMonitor
+
+from mocked_program import GenericMocks, run
+
+FORMAT_VERSION = 1
+
+
+class ResourceGraph:
+    """
+    Resources in registration order, stored as columns. Parents and dependencies are row numbers
+    (-1 for no parent) and types are indexes into `types`, so each URN and type is stored once.
+    """
+
+    def __init__(self, urns, types, type_ids, parents, dependencies, input_bytes):
+        self.urns = urns
+        self.types = types
+        self.type_ids = type_ids
+        self.parents = parents
+        self.dependencies = dependencies
+        self.input_bytes = input_bytes
+
+    def __len__(self):
+        return len(self.urns)
+
+    def type_of(self, row):
+        return self.types[self.type_ids[row]]
+
+    def write(self, path):
+        data = {
+            "version": FORMAT_VERSION,
+            "types": self.types,
+            "columns": {
+                "urn": self.urns,
+                "type": self.type_ids,
+                "parent": self.parents,
+                "dependencies": self.dependencies,
+                "input_bytes": self.input_bytes,
+            },
+        }
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt") as fp:
+            json.dump(data, fp, separators=(",", ":"))
+
+    @classmethod
+    def read(cls, path):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt") as fp:
+            data = json.load(fp)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported graph format {data.get('version')}")
+        columns = data["columns"]
+        return cls(
+            columns["urn"],
+            data["types"],
+            columns["type"],
+            columns["parent"],
+            columns["dependencies"],
+            columns["input_bytes"],
+        )
+
+
+class GraphRecorder(MockMonitor):
+    """A mock monitor that also records every resource registration."""
+
+    def __init__(self, mocks):
+        super().__init__(mocks)
+        self._lock = threading.Lock()
+        self._rows = []
+
+    def RegisterResource(self, request):
+        response = super().RegisterResource(request)
+        if request.type != "pulumi:pulumi:Stack":
+            with self._lock:
+                # A resource is only registered once everything it depends on has been, so the
+                # rows stay in topological order.
+                self._rows.append(
+                    (
+                        response.urn,
+                        request.type,
+                        request.parent,
+                        list(request.dependencies),
+                        request.object.ByteSize(),
+                    )
+                )
+        return response
+
+    def graph(self):
+        with self._lock:
+            rows = list(self._rows)
+        index = {urn: i for i, (urn, *_) in enumerate(rows)}
+        types = sorted({type_ for _, type_, *_ in rows})
+        type_index = {type_: i for i, type_ in enumerate(types)}
+        return ResourceGraph(
+            [urn for urn, *_ in rows],
+            types,
+            [type_index[type_] for _, type_, *_ in rows],
+            [index.get(parent, -1) for _, _, parent, *_ in rows],
+            # Dependencies on resources that weren't registered, e.g. the stack, are dropped.
+            [sorted({index[d] for d in deps if d in index}) for *_, deps, _ in rows],
+            [size for *_, size in rows],
+        )
+
+
+def analyze(graph):
+    """Summarize the structure of `graph`."""
+    n = len(graph)
+    depth = [0] * n
+    # Longest chain of resources, following both dependencies and parents, ending at each row.
+    chain = [1] * n
+    previous = [-1] * n
+    dependents = [0] * n
+    for row in range(n):
+        parent = graph.parents[row]
+        if parent >= 0:
+            depth[row] = depth[parent] + 1
+        for pred in set(graph.dependencies[row]) | ({parent} if parent >= 0 else set()):
+            if chain[pred] + 1 > chain[row]:
+                chain[row], previous[row] = chain[pred] + 1, pred
+        for dep in graph.dependencies[row]:
+            dependents[dep] += 1
+
+    critical_path = []
+    row = max(range(n), key=chain.__getitem__) if n else -1
+    while row >= 0:
+        critical_path.append(graph.urns[row])
+        row = previous[row]
+    critical_path.reverse()
+
+    type_counts = collections.Counter(graph.type_of(row) for row in range(n))
+    return {
+        "resources": n,
+        "types": len(type_counts),
+        "edges": sum(len(deps) for deps in graph.dependencies),
+        "input_bytes": sum(graph.input_bytes),
+        "parent_depth": max(depth, default=0),
+        "critical_path_length": len(critical_path),
+        "critical_path": critical_path,
+        "fan_out": sorted(
+            ((dependents[row], graph.urns[row]) for row in range(n) if dependents[row]),
+            reverse=True,
+        ),
+        "largest_inputs": sorted(
+            ((graph.input_bytes[row], graph.urns[row]) for row in range(n)), reverse=True
+        ),
+        "type_counts": type_counts.most_common(),
+    }
+
+
+def print_report(report, top):
+    print(
+        f"{report['resources']} resources of {report['types']} types, {report['edges']} "
+        f"dependencies, {report['input_bytes']} bytes of inputs"
+    )
+    print(f"parent tree depth:    {report['parent_depth']}")
+    print(f"critical path length: {report['critical_path_length']}")
+    for urn in report["critical_path"]:
+        print(f"  {urn}")
+
+    print("\nwidest fan-out (resources that depend on each):")
+    for count, urn in report["fan_out"][:top]:
+        print(f"  {count:>6}  {urn}")
+    print("\nlargest inputs (bytes):")
+    for size, urn in report["largest_inputs"][:top]:
+        print(f"  {size:>8}  {urn}")
+    print("\nresources per type:")
+    for type_, count in report["type_counts"][:top]:
+        print(f"  {count:>6}  {type_}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = ap.add_subparsers(dest="command", required=True)
+
+    dump = commands.add_parser("dump", help="run a program under mocks and write its graph")
+    dump.add_argument("program_dir")
+    dump.add_argument("--config", action="append", default=[], metavar="KEY=VALUE")
+    dump.add_argument("--out", required=True, help="graph file; gzipped if it ends in .gz")
+
+    report = commands.add_parser("analyze", help="report on the structure of a graph file")
+    report.add_argument("graph")
+    report.add_argument("--top", type=int, default=10, help="entries to list per table")
+    report.add_argument("--json", action="store_true", help="print the report as JSON")
+
+    args = ap.parse_args(argv)
+    if args.command == "dump":
+        # `run` changes into the program's directory.
+        out = os.path.abspath(args.out)
+        recorder = GraphRecorder(GenericMocks())
+        config = dict(pair.partition("=")[::2] for pair in args.config)
+        result = run(args.program_dir, config=config, mocks=recorder.mocks, monitor=recorder)
+        graph = recorder.graph()
+        graph.write(out)
+        print(f"{len(graph)} resources written to {out}", file=sys.stderr)
+        if not result["ok"]:
+            print(result["error"], file=sys.stderr)
+            return 1
+        return 0
+
+    report = analyze(ResourceGraph.read(args.graph))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Smoke-test every Python example under generic mocks, without deploying anything.
+
+Finds every directory with a Python `Pulumi.yaml` and a `__main__.py` and runs each program once
+with `mocked_program.py`, each in its own Python process so that programs can't affect each other.
+Reports how many resources each program registered, how long it ran and why it failed, and exits
+with 1 if any program failed, e.g. after bumping the SDK versions in the examples:
+
+    python smoke_programs.py --config-file smoke-config.yaml
+    python smoke_programs.py --examples aws-py-s3-folder,testing-unit-py --out smoke.json
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
+MOCKED_PROGRAM = os.path.join(HERE, "mocked_program.py")
+
+from mocked_program import discover_programs  # noqa: E402
+
+
+def smoke(program_dir, config, timeout, lazy_imports):
+    example = os.path.relpath(program_dir, REPO_ROOT)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, "result.json")
+        cmd = [sys.executable, MOCKED_PROGRAM, program_dir, "--out", out]
+        for key, value in config.get(example, {}).items():
+            cmd += ["--config", f"{key}={value}"]
+        if lazy_imports:
+            cmd.append("--lazy-imports")
+
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {
+                "example": example,
+                "status": "timeout",
+                "error": f"still running after {timeout}s",
+                "process_seconds": time.perf_counter() - start,
+            }
+        wall = time.perf_counter() - start
+
+        if os.path.exists(out):
+            with open(out) as fp:
+                result = json.load(fp)
+        else:
+            # The harness itself failed, e.g. the program called `sys.exit`.
+            result = {"ok": False, "error": proc.stderr.strip()[-500:] or f"exit {proc.returncode}"}
+
+    return {
+        "example": example,
+        "status": "ok" if result.get("ok") else "failed",
+        "resources": result.get("resources", 0),
+        "seconds": result.get("seconds", 0.0),
+        "process_seconds": wall,
+        "error": result.get("error"),
+        "traceback": result.get("traceback"),
+    }
+
+
+def print_report(results, elapsed):
+    print(f"{'example':<50} {'resources':>9} {'run s':>7} {'process s':>10}  status")
+    for result in sorted(results, key=lambda r: (r["status"] == "ok", r["example"])):
+        status = result["status"]
+        if result.get("error"):
+            status += ": " + result["error"].splitlines()[0][:80]
+        print(
+            f"{result['example']:<50} {result.get('resources', 0):>9} "
+            f"{result.get('seconds', 0):>7.2f} {result['process_seconds']:>10.2f}  {status}"
+        )
+
+    failed = [r for r in results if r["status"] != "ok"]
+    missing = sum(1 for r in failed if (r.get("error") or "").startswith("ModuleNotFoundError"))
+    print()
+    print(
+        f"{len(results)} programs, {len(results) - len(failed)} ok, {len(failed)} failed "
+        f"({missing} on missing modules), "
+        f"{sum(r.get('resources', 0) for r in results)} resources in {elapsed:.1f}s"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", default=REPO_ROOT, help="directory to search for programs")
+    parser.add_argument("--examples", help="comma-separated example directories to run")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="programs run at once")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per program")
+    parser.add_argument(
+        "--config-file",
+        help="YAML mapping example directories to the config they need, e.g. "
+        "`aws-py-static-website: {targetDomain: www.example.com}`",
+    )
+    parser.add_argument(
+        "--lazy-imports",
+        action="store_true",
+        help="defer provider SDK submodule imports until first use",
+    )
+    parser.add_argument("--out", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.examples:
+        programs = [os.path.join(args.root, e) for e in args.examples.split(",") if e]
+    else:
+        programs = discover_programs(args.root)
+
+    config = {}
+    if args.config_file:
+        with open(args.config_file) as fp:
+            config = yaml.safe_load(fp) or {}
+
+    start = time.perf_counter()
+    # Each program runs in its own process; the threads only wait on them.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(
+            pool.map(lambda p: smoke(p, config, args.timeout, args.lazy_imports), programs)
+        )
+    elapsed = time.perf_counter() - start
+
+    print_report(results, elapsed)
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump({"elapsed_seconds": elapsed, "results": results}, fp, indent=2)
+    return 1 if any(r["status"] != "ok" for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
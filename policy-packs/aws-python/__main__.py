@@ -1,32 +1,23 @@
 from pulumi_policy import (
     EnforcementLevel,
     PolicyPack,
-    ReportViolation,
-    ResourceValidationArgs,
     ResourceValidationPolicy,
 )
 
-
-def s3_no_public_read_validator(args: ResourceValidationArgs, report_violation: ReportViolation):
-    if args.resource_type == "aws:s3/bucket:Bucket" and "acl" in args.props:
-        acl = args.props["acl"]
-        if acl == "public-read" or acl == "public-read-write":
-            report_violation(
-                "You cannot set public-read or public-read-write on an S3 bucket. "
-                + "Read more about ACLs here: https://docs.aws.amazon.com/AmazonS3/latest/dev/acl-overview.html"
-            )
-
+from policy_timing import instrument
+from rules import public_read_rules, s3_no_public_read_validator
+from validation_cache import cached
 
 s3_no_public_read = ResourceValidationPolicy(
     name="s3-no-public-read",
     description="Prohibits setting the publicRead or publicReadWrite permission on AWS S3 buckets.",
-    validate=s3_no_public_read_validator,
+    # Validated directly unless PULUMI_POLICY_CACHE_FILE is set, which these checks are too cheap
+    # to benefit from; see the README.
+    validate=cached("s3-no-public-read", s3_no_public_read_validator, public_read_rules),
 )
 
 PolicyPack(
     name="aws-python",
     enforcement_level=EnforcementLevel.MANDATORY,
-    policies=[
-        s3_no_public_read,
-    ],
+    policies=instrument([s3_no_public_read]),
 )
@@ -0,0 +1,55 @@
+from collections.abc import Mapping
+from typing import Iterator
+
+from pulumi_policy import ReportViolation, ResourceValidationArgs
+
+
+def compile_rules(rules):
+    """
+    Turn `type -> "dotted.property.path" -> {"values": forbidden values, "message": violation}`
+    into a table keyed by type.
+    """
+    return {
+        resource_type: tuple(
+            (tuple(path.split(".")), frozenset(rule["values"]), rule["message"])
+            for path, rule in paths.items()
+        )
+        for resource_type, paths in rules.items()
+    }
+
+
+def get_path(props, path):
+    for key in path:
+        if not isinstance(props, Mapping) or key not in props:
+            return None
+        props = props[key]
+    return props
+
+
+def violations(table, args: ResourceValidationArgs) -> Iterator[str]:
+    """The messages of the rules in `table` that `args` breaks."""
+    # Resources of types without rules cost a single dict lookup.
+    for path, forbidden, message in table.get(args.resource_type, ()):
+        value = get_path(args.props, path)
+        if isinstance(value, str) and value in forbidden:
+            yield message
+
+
+# Resource type -> property path -> values that make the resource publicly readable.
+public_read_rules = compile_rules(
+    {
+        "aws:s3/bucket:Bucket": {
+            "acl": {
+                "values": ["public-read", "public-read-write"],
+                "message": "You cannot set public-read or public-read-write on an S3 bucket. "
+                + "Read more about ACLs here: "
+                + "https://docs.aws.amazon.com/AmazonS3/latest/dev/acl-overview.html",
+            },
+        },
+    }
+)
+
+
+def s3_no_public_read_validator(args: ResourceValidationArgs, report_violation: ReportViolation):
+    for message in violations(public_read_rules, args):
+        report_violation(message)
@@ -0,0 +1,211 @@
+"""
+An opt-in cache of resource validation results that persists across previews.
+
+The resource validators in this pack only look at a resource's type, its inputs and the policy's
+config, so a resource whose inputs haven't changed since the last preview gets the same result.
+Set `PULUMI_POLICY_CACHE_FILE` to a file to keep the results in; unchanged resources then skip
+validation and replay the violations recorded for them. Without it every resource is validated
+as usual. Resources with unknown inputs, e.g. during a preview, are always validated.
+
+Keys include a fingerprint of the source of the validator's module and of its rule table, so
+changing the validator, a helper defined next to it or a rule invalidates the results recorded
+before.
+
+The cache keeps at most `PULUMI_POLICY_CACHE_SIZE` results (100000 by default), evicting the least
+recently used ones. New results are appended to the file as they are computed, since the engine
+stops the policy pack process without giving it a chance to write anything at exit.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence, Set
+from typing import Any, List, Optional
+
+from pulumi_policy import ReportViolation, ResourceValidation, ResourceValidationArgs
+from pulumi_policy.proxy import (
+    UNKNOWN_ARCHIVE_VALUE,
+    UNKNOWN_ARRAY_VALUE,
+    UNKNOWN_ASSET_VALUE,
+    UNKNOWN_BOOLEAN_VALUE,
+    UNKNOWN_NUMBER_VALUE,
+    UNKNOWN_OBJECT_VALUE,
+    UNKNOWN_STRING_VALUE,
+    UnknownValueError,
+)
+
+CACHE_FILE_ENV = "PULUMI_POLICY_CACHE_FILE"
+CACHE_SIZE_ENV = "PULUMI_POLICY_CACHE_SIZE"
+
+UNKNOWN_VALUES = frozenset(
+    (
+        UNKNOWN_ARCHIVE_VALUE,
+        UNKNOWN_ARRAY_VALUE,
+        UNKNOWN_ASSET_VALUE,
+        UNKNOWN_BOOLEAN_VALUE,
+        UNKNOWN_NUMBER_VALUE,
+        UNKNOWN_OBJECT_VALUE,
+        UNKNOWN_STRING_VALUE,
+    )
+)
+
+
+class Uncacheable(Exception):
+    """Raised for inputs that can't be keyed: unknown values, or values JSON can't represent."""
+
+
+class ValidationCache:
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+        # Line buffered, so every result reaches the file as soon as it is recorded.
+        self._file = open(self.path, "a", buffering=1)
+
+    def _load(self):
+        lines = 0
+        try:
+            with open(self.path) as fp:
+                for line in fp:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["k"]] = entry["v"]
+                        self._entries.move_to_end(entry["k"])
+                    except (ValueError, KeyError, TypeError):
+                        continue  # e.g. a line cut short when the process was stopped
+                    lines += 1
+        except OSError:
+            pass
+        self._evict()
+        if lines > 2 * self.max_entries:
+            self._compact()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _compact(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fp:
+            for key, messages in self._entries.items():
+                fp.write(json.dumps({"k": key, "v": messages}) + "\n")
+        os.replace(tmp, self.path)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            messages = self._entries.get(key)
+            if messages is not None:
+                self._entries.move_to_end(key)
+            return messages
+
+    def put(self, key: str, messages: List[str]):
+        with self._lock:
+            self._entries[key] = messages
+            self._entries.move_to_end(key)
+            self._evict()
+            self._file.write(json.dumps({"k": key, "v": messages}) + "\n")
+
+
+def plain(value: Any) -> Any:
+    """
+    Copy `value` into plain dicts, lists and scalars. The analyzer passes inputs wrapped in
+    `Mapping` and `Sequence` proxies, which JSON can't serialize.
+    """
+    if isinstance(value, str):
+        if value in UNKNOWN_VALUES:
+            raise Uncacheable(value)
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Mapping):
+        try:
+            return {str(k): plain(v) for k, v in value.items()}
+        except UnknownValueError as err:
+            raise Uncacheable(err.message) from err
+    if isinstance(value, Set):
+        return sorted((plain(v) for v in value), key=json.dumps)
+    if isinstance(value, Sequence):
+        try:
+            return [plain(v) for v in value]
+        except UnknownValueError as err:
+            raise Uncacheable(err.message) from err
+    raise Uncacheable(f"can't key a {type(value).__name__}")
+
+
+def fingerprint(validate: ResourceValidation, rules: Any = None) -> str:
+    """
+    A hash of the source of the module that defines the validator, which also covers the helpers
+    it calls from there, and of the rule table it applies.
+    """
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(sys.modules[validate.__module__]).encode())
+    digest.update(json.dumps(plain(rules), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def cache_key(version: str, policy_name: str, args: ResourceValidationArgs) -> str:
+    """The key of `args`' result; raises `Uncacheable` for inputs that can't be keyed."""
+    payload = json.dumps(
+        [version, policy_name, args.resource_type, plain(args.props), plain(args.get_config())],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _open_cache() -> Optional[ValidationCache]:
+    path = os.environ.get(CACHE_FILE_ENV)
+    if not path:
+        return None
+    return ValidationCache(path, int(os.environ.get(CACHE_SIZE_ENV, "100000")))
+
+
+cache = _open_cache()
+
+
+def cached(policy_name: str, validate: ResourceValidation, rules: Any = None) -> ResourceValidation:
+    """
+    Wrap a resource validator so its violations are served from the cache for resources it has
+    already seen. `rules` is the rule table the validator applies, if any, so that changing it
+    invalidates cached results. Returns `validate` unchanged when the cache isn't enabled.
+    """
+    if cache is None:
+        return validate
+
+    version = fingerprint(validate, rules)
+
+    def cached_validate(args: ResourceValidationArgs, report_violation: ReportViolation):
+        try:
+            key = cache_key(version, policy_name, args)
+        except Uncacheable:
+            return validate(args, report_violation)
+        messages = cache.get(key)
+        if messages is not None:
+            for message in messages:
+                report_violation(message)
+            return None
+
+        messages = []
+
+        def record(message: str, urn: Optional[str] = None):
+            messages.append(message)
+            report_violation(message)
+
+        result = validate(args, record)
+        if not inspect.isawaitable(result):
+            cache.put(key, messages)
+            return None
+
+        async def finish():
+            await result
+            cache.put(key, messages)
+
+        return finish()
+
+    return cached_validate
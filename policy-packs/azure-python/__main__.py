@@ -1,38 +1,27 @@
 from pulumi_policy import (
     EnforcementLevel,
     PolicyPack,
-    ReportViolation,
-    ResourceValidationArgs,
     ResourceValidationPolicy,
 )
 
-
-def storage_container_no_public_read_validator(
-    args: ResourceValidationArgs, report_violation: ReportViolation
-):
-    if (
-        args.resource_type == "azure:storage/container:Container"
-        and "containerAccessType" in args.props
-    ):
-        access_type = args.props["containerAccessType"]
-        if access_type == "blob" or access_type == "container":
-            report_violation(
-                "Azure Storage Container must not have blob or container access set. "
-                + "Read more about read access here: "
-                + "https://docs.microsoft.com/en-us/azure/storage/blobs/storage-manage-access-to-resources"
-            )
-
+from policy_timing import instrument
+from rules import public_read_rules, storage_container_no_public_read_validator
+from validation_cache import cached
 
 storage_container_no_public_read = ResourceValidationPolicy(
     name="storage-container-no-public-read",
     description="Prohibits setting the public permission on Azure Storage Blob Containers.",
-    validate=storage_container_no_public_read_validator,
+    # Validated directly unless PULUMI_POLICY_CACHE_FILE is set, which these checks are too cheap
+    # to benefit from; see the README.
+    validate=cached(
+        "storage-container-no-public-read",
+        storage_container_no_public_read_validator,
+        public_read_rules,
+    ),
 )
 
 PolicyPack(
     name="azure-python",
     enforcement_level=EnforcementLevel.MANDATORY,
-    policies=[
-        storage_container_no_public_read,
-    ],
+    policies=instrument([storage_container_no_public_read]),
 )
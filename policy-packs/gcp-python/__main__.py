@@ -1,33 +1,25 @@
 from pulumi_policy import (
     EnforcementLevel,
     PolicyPack,
-    ReportViolation,
-    ResourceValidationArgs,
     ResourceValidationPolicy,
 )
 
-
-def storage_bucket_no_public_read_validator(
-    args: ResourceValidationArgs, report_violation: ReportViolation
-):
-    if args.resource_type == "gcp:storage/bucketACL:BucketACL" and "predefinedAcl" in args.props:
-        acl = args.props["predefinedAcl"]
-        if acl == "public-read" or acl == "public-read-write":
-            report_violation(
-                "Storage buckets acl cannot be set to public-read or public-read-write."
-            )
-
+from policy_timing import instrument
+from rules import public_read_rules, storage_bucket_no_public_read_validator
+from validation_cache import cached
 
 storage_bucket_no_public_read = ResourceValidationPolicy(
     name="storage-bucket-no-public-read",
     description="Prohibits setting the publicRead or publicReadWrite permission on GCP Storage buckets.",
-    validate=storage_bucket_no_public_read_validator,
+    # Validated directly unless PULUMI_POLICY_CACHE_FILE is set, which these checks are too cheap
+    # to benefit from; see the README.
+    validate=cached(
+        "storage-bucket-no-public-read", storage_bucket_no_public_read_validator, public_read_rules
+    ),
 )
 
 PolicyPack(
     name="gcp-python",
     enforcement_level=EnforcementLevel.MANDATORY,
-    policies=[
-        storage_bucket_no_public_read,
-    ],
+    policies=instrument([storage_bucket_no_public_read]),
 )
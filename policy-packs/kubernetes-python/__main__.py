@@ -1,33 +1,23 @@
 from pulumi_policy import (
     EnforcementLevel,
     PolicyPack,
-    ReportViolation,
-    ResourceValidationArgs,
     ResourceValidationPolicy,
 )
 
-
-def no_public_services_validator(args: ResourceValidationArgs, report_violation: ReportViolation):
-    if args.resource_type == "kubernetes:core/v1:Service" and "spec" in args.props:
-        spec = args.props["spec"]
-        if "type" in spec and spec["type"] == "LoadBalancer":
-            report_violation(
-                "Kubernetes Services cannot be of type LoadBalancer, which are exposed to "
-                + "anything that can reach the Kubernetes cluster. This likely including the "
-                + "public Internet."
-            )
-
+from policy_timing import instrument
+from rules import no_public_services_validator, public_service_rules
+from validation_cache import cached
 
 no_public_services = ResourceValidationPolicy(
     name="no-public-services",
     description="Kubernetes Services should be cluster-private.",
-    validate=no_public_services_validator,
+    # Validated directly unless PULUMI_POLICY_CACHE_FILE is set, which these checks are too cheap
+    # to benefit from; see the README.
+    validate=cached("no-public-services", no_public_services_validator, public_service_rules),
 )
 
 PolicyPack(
     name="kubernetes-python",
     enforcement_level=EnforcementLevel.MANDATORY,
-    policies=[
-        no_public_services,
-    ],
+    policies=instrument([no_public_services]),
 )
@@ -0,0 +1,140 @@
+"""Check rendered Kubernetes manifests against this pack's rules, without running a preview.
+
+Takes YAML files, or directories to search for `*.yaml` and `*.yml` files, such as the output of
+`helm template`. Every document in every file is mapped to the Pulumi type of its `apiVersion` and
+`kind` and validated with the same validators as the policy pack. Files are parsed in parallel by a
+pool of worker processes, using libyaml when PyYAML was built with it.
+
+Violations are printed one per line, and the exit code is 1 if there were any or if a file could
+not be parsed or validated, so a chart pipeline can gate on it:
+
+    helm template my-release ./chart --output-dir rendered
+    python validate_manifests.py rendered/
+"""
+
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+from typing import Any, Iterator, List, NamedTuple, Optional
+
+import yaml
+
+from rules import no_public_services_validator
+
+try:
+    Loader = yaml.CSafeLoader
+except AttributeError:  # PyYAML built without libyaml
+    Loader = yaml.SafeLoader
+
+VALIDATORS = [("no-public-services", no_public_services_validator)]
+
+
+class Manifest(NamedTuple):
+    """The parts of `ResourceValidationArgs` the validators read."""
+
+    resource_type: str
+    props: Any
+    name: str
+
+
+def resource_type(doc: dict) -> str:
+    """The Pulumi type of a manifest, e.g. `kubernetes:apps/v1:Deployment`."""
+    api_version = str(doc.get("apiVersion") or "")
+    if "/" not in api_version:
+        api_version = f"core/{api_version}"
+    return f"kubernetes:{api_version}:{doc.get('kind') or ''}"
+
+
+def manifests(docs) -> Iterator[Manifest]:
+    for doc in docs:
+        if not isinstance(doc, dict):
+            continue  # e.g. an empty document between two `---`
+        kind = doc.get("kind")
+        if isinstance(kind, str) and kind.endswith("List") and isinstance(doc.get("items"), list):
+            yield from manifests(doc["items"])
+            continue
+        metadata = doc.get("metadata")
+        if not isinstance(metadata, dict):
+            metadata = {}
+        name = metadata.get("name", "")
+        if metadata.get("namespace"):
+            name = f"{metadata['namespace']}/{name}"
+        yield Manifest(resource_type(doc), doc, name)
+
+
+def yaml_files(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            files += [
+                os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith((".yaml", ".yml"))
+            ]
+    return files
+
+
+def validate_file(path: str):
+    """
+    Returns the number of manifests in `path`, its violations, and an error if it didn't parse or
+    one of its documents couldn't be validated.
+    """
+    violations = []
+    count = 0
+    try:
+        with open(path, "rb") as fp:
+            docs = list(yaml.load_all(fp, Loader=Loader))
+    except (OSError, yaml.YAMLError) as e:
+        return count, violations, f"{type(e).__name__}: {e}"
+
+    try:
+        for manifest in manifests(docs):
+            count += 1
+            for policy, validate in VALIDATORS:
+
+                def report_violation(message: str, urn: Optional[str] = None):
+                    violations.append((policy, manifest.resource_type, manifest.name, message))
+
+                validate(manifest, report_violation)
+    except Exception as e:
+        # A malformed document fails its own file, not the whole run.
+        return count, violations, f"document {count}: {type(e).__name__}: {e}"
+    return count, violations, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="YAML files or directories of them")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    files = yaml_files(args.paths)
+    manifest_count = violation_count = error_count = 0
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        chunksize = max(1, len(files) // (4 * args.workers))
+        results = pool.map(validate_file, files, chunksize=chunksize)
+        for path, (count, violations, error) in zip(files, results):
+            manifest_count += count
+            for policy, type_, name, message in violations:
+                print(f"{path}: {type_} {name}: [{policy}] {message}")
+            violation_count += len(violations)
+            if error:
+                print(f"{path}: {error}", file=sys.stderr)
+                error_count += 1
+
+    print(
+        f"{len(files)} files, {manifest_count} manifests, {violation_count} violations, "
+        f"{error_count} errors in {time.perf_counter() - start:.2f}s",
+        file=sys.stderr,
+    )
+    return 1 if violation_count or error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,15 +6,24 @@ from pulumi_policy import (
     StackValidationPolicy,
 )
 
+from policy_timing import instrument
+from stack_index import SharedStackIndex
+
 required_region = "us-west-1"
 max_num_buckets = 1
 
+s3_bucket_type = "aws:s3/bucket:Bucket"
+
+stack_index = SharedStackIndex(
+    policies=["s3-region-check", "s3-count-check"],
+    keep=[s3_bucket_type],
+)
+
 
 def s3_region_check_validator(stack: StackValidationArgs, report_violation: ReportViolation):
-    for resource in stack.resources:
-        if resource.resource_type == "aws:s3/bucket:Bucket":
-            if "region" in resource.props and resource.props["region"] != required_region:
-                report_violation(f"Bucket, {resource.name}, must be in region {required_region}")
+    for resource in stack_index.get(stack, "s3-region-check").of_type(s3_bucket_type):
+        if "region" in resource.props and resource.props["region"] != required_region:
+            report_violation(f"Bucket, {resource.name}, must be in region {required_region}")
 
 
 s3_region_check = StackValidationPolicy(
@@ -25,13 +34,7 @@ s3_region_check = StackValidationPolicy(
 
 
 def s3_count_check_validator(stack: StackValidationArgs, report_violation: ReportViolation):
-    buckets = list(
-        filter(
-            (lambda resource: resource.resource_type == "aws:s3/bucket:Bucket"),
-            stack.resources,
-        )
-    )
-    if len(buckets) > max_num_buckets:
+    if stack_index.get(stack, "s3-count-check").count(s3_bucket_type) > max_num_buckets:
         report_violation(f"No more than {max_num_buckets} bucket(s) should be created.")
 
 
@@ -44,5 +47,5 @@ s3_count_check = StackValidationPolicy(
 PolicyPack(
     name="aws-python",
     enforcement_level=EnforcementLevel.ADVISORY,
-    policies=[s3_region_check, s3_count_check],
+    policies=instrument([s3_region_check, s3_count_check]),
 )
@@ -0,0 +1,142 @@
+"""
+Opt-in latency instrumentation for the policies in this pack.
+
+Set `PULUMI_POLICY_TIMINGS_DIR` to a directory and every policy passed through `instrument`
+records its call count, cumulative time and p50/p99 latency, broken down by resource type. The
+summary goes to `<dir>/<pack directory>.json`, slowest policies and resource types first. It is
+rewritten once a second while policies are running and right after every stack validation, the
+last thing the engine asks of a pack in a preview or update; there is no hook to write it when the
+engine shuts the pack down.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from inspect import isawaitable
+from typing import Callable, Dict, List, Optional
+
+from pulumi_policy import Policy, ResourceValidationPolicy, StackValidationPolicy
+
+TIMINGS_DIR_ENV = "PULUMI_POLICY_TIMINGS_DIR"
+
+STACK = "(stack)"
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class PolicyTimings:
+    def __init__(self, path: str, interval: float = 1.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._by_type: Dict[str, Dict[str, List[float]]] = defaultdict(
+            lambda: defaultdict(lambda: [0, 0.0])
+        )
+        self._dirty = False
+        flusher = threading.Thread(target=self._flush_every, args=(interval,), daemon=True)
+        flusher.start()
+        atexit.register(self.flush)
+
+    def record(self, policy: str, resource_type: str, seconds: float):
+        with self._lock:
+            self._durations[policy].append(seconds)
+            entry = self._by_type[policy][resource_type]
+            entry[0] += 1
+            entry[1] += seconds
+            self._dirty = True
+
+    def summary(self) -> List[dict]:
+        with self._lock:
+            policies = []
+            for policy, durations in self._durations.items():
+                ordered = sorted(durations)
+                types = sorted(
+                    self._by_type[policy].items(), key=lambda item: item[1][1], reverse=True
+                )
+                policies.append(
+                    {
+                        "policy": policy,
+                        "calls": len(ordered),
+                        "total_seconds": sum(ordered),
+                        "p50_us": _percentile(ordered, 0.50) * 1e6,
+                        "p99_us": _percentile(ordered, 0.99) * 1e6,
+                        "max_us": ordered[-1] * 1e6,
+                        "resource_types": [
+                            {"resource_type": t, "calls": calls, "total_seconds": total}
+                            for t, (calls, total) in types
+                        ],
+                    }
+                )
+            self._dirty = False
+        return sorted(policies, key=lambda p: p["total_seconds"], reverse=True)
+
+    def flush(self):
+        if not self._dirty:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fp:
+            json.dump({"pid": os.getpid(), "policies": self.summary()}, fp, indent=2)
+        os.replace(tmp, self.path)
+
+    def _flush_every(self, interval: float):
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+
+def _open_timings() -> Optional[PolicyTimings]:
+    directory = os.environ.get(TIMINGS_DIR_ENV)
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    pack = os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+    return PolicyTimings(os.path.join(directory, f"{pack}.json"))
+
+
+timings = _open_timings()
+
+
+def _timed(policy: Policy) -> Callable:
+    validate = policy.validate
+    is_stack = isinstance(policy, StackValidationPolicy)
+
+    def record(args, start):
+        resource_type = STACK if is_stack else args.resource_type
+        timings.record(policy.name, resource_type, time.perf_counter() - start)
+        if is_stack:
+            timings.flush()
+
+    def timed_validate(args, report_violation):
+        start = time.perf_counter()
+        result = validate(args, report_violation)
+        if not isawaitable(result):
+            record(args, start)
+            return result
+
+        async def finish():
+            try:
+                return await result
+            finally:
+                record(args, start)
+
+        return finish()
+
+    return timed_validate
+
+
+def instrument(policies: List[Policy]) -> List[Policy]:
+    """
+    Time every call to the given resource and stack policies. Returns `policies`, untouched when
+    `PULUMI_POLICY_TIMINGS_DIR` isn't set.
+    """
+    if timings is None:
+        return policies
+    for policy in policies:
+        if isinstance(policy, (ResourceValidationPolicy, StackValidationPolicy)):
+            policy.validate = _timed(policy)
+    return policies
@@ -0,0 +1,76 @@
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from pulumi_policy import PolicyResource, StackValidationArgs
+
+
+class StackIndex:
+    """
+    Aggregates over a stack's resources, shared by all the stack policies in this pack.
+
+    A single pass over the stack counts the resources of every type and keeps the resources of the
+    types in `keep`, the only ones the policies need to look at one by one. Nothing else is copied,
+    so the index grows with the resources kept, not with the stack.
+    """
+
+    def __init__(self, resources: List[PolicyResource], keep: Iterable[str] = ()):
+        counts: Dict[str, int] = {}
+        kept: Dict[str, List[PolicyResource]] = {resource_type: [] for resource_type in keep}
+        # Bound once: this loop runs for every resource in the stack.
+        count_of, kept_of = counts.get, kept.get
+        for resource in resources:
+            resource_type = resource.resource_type
+            counts[resource_type] = count_of(resource_type, 0) + 1
+            rows = kept_of(resource_type)
+            if rows is not None:
+                rows.append(resource)
+        self.counts = Counter(counts)
+        self._kept = kept
+
+    def count(self, resource_type: str) -> int:
+        return self.counts[resource_type]
+
+    def of_type(self, resource_type: str) -> List[PolicyResource]:
+        if resource_type not in self._kept:
+            raise ValueError(f"the index doesn't keep resources of type {resource_type}")
+        return self._kept[resource_type]
+
+
+def _fingerprint(resources: List[PolicyResource]) -> tuple:
+    if not resources:
+        return (0,)
+    return (len(resources), resources[0].urn, resources[len(resources) // 2].urn, resources[-1].urn)
+
+
+class SharedStackIndex:
+    """
+    The index of the stack being validated, built once for all of the pack's stack `policies`.
+
+    The analyzer hands every stack policy its own copy of the stack's resources, so the index is
+    cached here and reused by the rest of the policies in the same validation. It is dropped as
+    soon as every policy has been served, so it doesn't outlive the validation. Each policy runs
+    once per validation: a policy asking for the index a second time means a new validation has
+    started (e.g. the update that follows a preview, where outputs are now known), and the index
+    is rebuilt.
+    """
+
+    def __init__(self, policies: Iterable[str], keep: Iterable[str] = ()):
+        self.policies: FrozenSet[str] = frozenset(policies)
+        self.keep: FrozenSet[str] = frozenset(keep)
+        self._index: Optional[StackIndex] = None
+        self._fingerprint: Optional[tuple] = None
+        self._served: set = set()
+
+    def get(self, stack: StackValidationArgs, policy_name: str) -> StackIndex:
+        fingerprint = _fingerprint(stack.resources)
+        if self._index is None or self._fingerprint != fingerprint or policy_name in self._served:
+            self._index = StackIndex(stack.resources, self.keep)
+            self._fingerprint = fingerprint
+            self._served = set()
+        index = self._index
+        self._served.add(policy_name)
+        if self._served >= self.policies:
+            self._index = None
+            self._fingerprint = None
+            self._served = set()
+        return index
@@ -0,0 +1,59 @@
+"""Copy the helper modules the Python policy packs share from `support/` into the packs.
+
+`pulumi policy publish` uploads a pack's own directory and nothing else, so each pack has to ship
+its own copy of the helpers it uses. `support/` holds the copy to edit; run this script afterwards
+to update the packs, or with `--check` to list the copies that differ from it and exit with 1:
+
+    python policy-packs/sync_support.py
+    python policy-packs/sync_support.py --check
+"""
+
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SUPPORT_DIR = os.path.join(HERE, "support")
+
+# Helper module -> the packs that ship a copy of it.
+SHARED_MODULES = {
+    "policy_timing.py": [
+        "aws-python",
+        "azure-python",
+        "gcp-python",
+        "kubernetes-python",
+        "stackvalidation-python",
+    ],
+    "validation_cache.py": ["aws-python", "azure-python", "gcp-python", "kubernetes-python"],
+}
+
+
+def copies():
+    for module, packs in SHARED_MODULES.items():
+        for pack in packs:
+            yield os.path.join(SUPPORT_DIR, module), os.path.join(HERE, pack, module)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="only report copies that differ")
+    args = parser.parse_args(argv)
+
+    stale = []
+    for source, target in copies():
+        if os.path.exists(target) and filecmp.cmp(source, target, shallow=False):
+            continue
+        if args.check:
+            stale.append(os.path.relpath(target, HERE))
+        else:
+            shutil.copyfile(source, target)
+
+    for path in stale:
+        print(f"{path} differs from support/; run policy-packs/sync_support.py", file=sys.stderr)
+    return 1 if stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
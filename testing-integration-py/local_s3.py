@@ -0,0 +1,41 @@
+import os
+
+import boto3
+from botocore.config import Config
+from pulumi import automation as auto
+
+# Set to the URL of an S3-compatible stand-in, e.g. LocalStack or `moto_server`, to run the
+# integration tests against it instead of AWS.
+ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL")
+
+if ENDPOINT_URL:
+    # The stand-ins accept any credentials, and none may be configured in CI.
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+
+def stack_config(region: str) -> auto.ConfigMap:
+    """The stack config that points the AWS provider at `region`, or at the stand-in if set."""
+    config = {"aws:region": auto.ConfigValue(value=region)}
+    if ENDPOINT_URL:
+        config.update(
+            {
+                "aws:endpoints[0].s3": auto.ConfigValue(value=ENDPOINT_URL),
+                "aws:s3UsePathStyle": auto.ConfigValue(value="true"),
+                "aws:skipCredentialsValidation": auto.ConfigValue(value="true"),
+                "aws:skipMetadataApiCheck": auto.ConfigValue(value="true"),
+                "aws:skipRequestingAccountId": auto.ConfigValue(value="true"),
+            }
+        )
+    return config
+
+
+def s3_resource(region: str):
+    if not ENDPOINT_URL:
+        return boto3.resource("s3", region_name=region)
+    return boto3.resource(
+        "s3",
+        region_name=region,
+        endpoint_url=ENDPOINT_URL,
+        config=Config(s3={"addressing_style": "path"}),
+    )
@@ -0,0 +1,118 @@
+"""Keep integration test stacks deployed between test runs instead of creating them every time.
+
+Tests lease a stack for a program and its config, and return it when they are done. A stack that
+was leased before is refreshed and updated, so only what changed since the last run (in the code,
+or in the cloud) is applied; a returned stack stays deployed for the next lease. Stacks are named
+after a hash of the project and the config, plus a slot number, and a lock file per slot keeps
+concurrent test runs on this machine from leasing the same stack.
+
+Destroy and remove every pooled stack of a program with:
+
+    python stack_pool.py drain [--work-dir .]
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+
+import yaml
+from pulumi import automation as auto
+
+POOL_DIR = os.path.join(os.path.expanduser("~"), ".pulumi", "stack-pool")
+STACK_PREFIX = "pool-"
+
+
+def config_hash(project: str, config: auto.ConfigMap) -> str:
+    payload = json.dumps(
+        [project, {key: [v.value, v.secret] for key, v in sorted(config.items())}],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+class StackPool:
+    def __init__(self, work_dir: str, on_output=print, refresh: bool = True):
+        self.work_dir = os.path.abspath(work_dir)
+        with open(os.path.join(self.work_dir, "Pulumi.yaml")) as fp:
+            self.project = yaml.safe_load(fp)["name"]
+        self.on_output = on_output
+        self.refresh = refresh
+        self._locks: Dict[str, int] = {}
+        os.makedirs(POOL_DIR, exist_ok=True)
+
+    def _lock(self, stack_name: str) -> Optional[int]:
+        fd = os.open(
+            os.path.join(POOL_DIR, f"{self.project}.{stack_name}.lock"), os.O_CREAT | os.O_RDWR
+        )
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def acquire(self, config: auto.ConfigMap, path: bool = False) -> auto.Stack:
+        """
+        Lease a stack deployed with `config`, e.g. from `setUpClass`. `path` is passed on to
+        `set_all_config`.
+        """
+        key = config_hash(self.project, config)
+        slot = 0
+        while True:
+            stack_name = f"{STACK_PREFIX}{key}-{slot}"
+            fd = self._lock(stack_name)
+            if fd is not None:
+                break
+            slot += 1  # leased by another test run; try the next stack in the pool
+
+        try:
+            stack = auto.create_or_select_stack(stack_name=stack_name, work_dir=self.work_dir)
+            stack.set_all_config(config, path=path)
+            warm = stack.info() is not None
+            if warm and self.refresh:
+                # Pick up whatever changed in the cloud since the stack was last returned.
+                stack.refresh(on_output=self.on_output)
+            stack.up(on_output=self.on_output)
+        except Exception:
+            os.close(fd)
+            raise
+        self._locks[stack_name] = fd
+        return stack
+
+    def release(self, stack: auto.Stack):
+        """Return a leased stack to the pool, e.g. from `tearDownClass`. It stays deployed."""
+        fd = self._locks.pop(stack.name, None)
+        if fd is not None:
+            os.close(fd)
+
+    def drain(self):
+        """Destroy and remove every pooled stack of this program that isn't leased."""
+        workspace = auto.LocalWorkspace(work_dir=self.work_dir)
+        for summary in workspace.list_stacks():
+            stack_name = summary.name.split("/")[-1]
+            if not stack_name.startswith(STACK_PREFIX):
+                continue
+            fd = self._lock(stack_name)
+            if fd is None:
+                continue
+            try:
+                stack = auto.select_stack(stack_name=stack_name, work_dir=self.work_dir)
+                stack.destroy(on_output=self.on_output)
+                workspace.remove_stack(stack_name)
+            finally:
+                os.close(fd)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the pool of integration test stacks.")
+    parser.add_argument("command", choices=["drain"])
+    parser.add_argument("--work-dir", default=os.path.dirname(os.path.abspath(__file__)))
+    args = parser.parse_args(argv)
+    StackPool(args.work_dir).drain()
+
+
+if __name__ == "__main__":
+    main()
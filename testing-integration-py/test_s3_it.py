@@ -1,31 +1,32 @@
 import os
 import unittest
 
-import boto3
-from pulumi import automation as auto
+from botocore.exceptions import ClientError
 
+from local_s3 import s3_resource, stack_config
 from resource_s3 import BUCKET_NAME, OUTPUT_KEY_BUCKET_NAME, OUTPUT_KEY_REGION
+from stack_pool import StackPool
+
+# Shared by every test class of this program; see `stack_pool.py`.
+POOL = StackPool(os.path.dirname(os.path.abspath(__file__)))
 
 
 class TestS3(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls) -> None:
-        cls.STACK_NAME = "staging"
         cls.REGION_NAME = "eu-north-1"
-        cls.WORK_DIR = os.path.join(os.path.dirname(__file__))
         cls.FILE_NAME = "bucket.txt"
 
-        cls.stack = auto.create_or_select_stack(stack_name=cls.STACK_NAME, work_dir=cls.WORK_DIR)
-        cls.stack.set_config("aws:region", auto.ConfigValue(value=cls.REGION_NAME))
-        cls.stack.up(on_output=print)
+        # Leases a warm stack when there is one, applying only what changed since its last use.
+        cls.stack = POOL.acquire(stack_config(cls.REGION_NAME), path=True)
         cls.outputs = cls.stack.outputs()
-        cls.s3 = boto3.resource("s3")
+        cls.s3 = s3_resource(cls.REGION_NAME)
 
     @classmethod
     def tearDownClass(cls) -> None:
-        cls.stack.destroy(on_output=print)
-        cls.stack.workspace.remove_stack(cls.STACK_NAME)
+        # The stack stays deployed for the next run; `python stack_pool.py drain` destroys it.
+        POOL.release(cls.stack)
 
     def test_s3_output_region(self):
         bucket_region = self.outputs.get(OUTPUT_KEY_REGION)
@@ -36,12 +37,12 @@ class TestS3(unittest.TestCase):
         self.assertIn(BUCKET_NAME, bucket_name_output.value)
 
     def test_s3_exist(self):
-        buckets = self.s3.buckets.all()
-        bucket_names = []
-        for bucket in buckets:
-            bucket_names.append(bucket.name)
         output_bucket_name = self.outputs.get(OUTPUT_KEY_BUCKET_NAME).value
-        self.assertIn(output_bucket_name, bucket_names)
+        # Ask for the one bucket rather than listing every bucket in the account.
+        try:
+            self.s3.meta.client.head_bucket(Bucket=output_bucket_name)
+        except ClientError as e:
+            self.fail(f"bucket {output_bucket_name} does not exist: {e}")
 
     def test_s3_create_permission(self):
         output_bucket_name = self.outputs.get(OUTPUT_KEY_BUCKET_NAME).value
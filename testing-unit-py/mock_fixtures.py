@@ -0,0 +1,162 @@
+"""
+Record the results of calls and the outputs of resources once, and replay them as mocks.
+
+A fixture maps each call's token and arguments to its result, and each resource's type and name
+to its id and the outputs its provider computed (those that aren't inputs). `RecordingMonitor`
+fills one in from a real preview or update (see `record_fixtures.py`), and `RecordingMocks` from
+any other `Mocks`. `ReplayMocks` then serves the recorded values to unit tests, without network
+access or hand-written mock branches.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+import pulumi
+from pulumi.runtime import rpc
+
+# How `deserialize_properties` marks secrets; their values are never written to a fixture.
+SECRET_SIG_KEY = "4dabf18193072939515e22adb298388d"
+SECRET_SIG = "1b47061264138c4ac30d75fd1eb44270"
+REDACTED = "[secret]"
+
+
+def _canonical(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def call_key(token: str, args: dict) -> str:
+    return f"{token} {_canonical(args)}"
+
+
+def resource_key(type_: str, name: str) -> str:
+    return f"{type_}::{name}"
+
+
+def _known(value):
+    """`value` without unknowns (outputs not known during a preview) and with secrets redacted."""
+    if isinstance(value, dict):
+        if value.get(SECRET_SIG_KEY) == SECRET_SIG:
+            return REDACTED
+        return {k: _known(v) for k, v in value.items() if v != rpc.UNKNOWN}
+    if isinstance(value, list):
+        return [_known(v) for v in value if v != rpc.UNKNOWN]
+    return value
+
+
+class Fixture:
+    def __init__(
+        self,
+        calls: Optional[Dict[str, Any]] = None,
+        resources: Optional[Dict[str, Any]] = None,
+    ):
+        self.calls = calls or {}
+        self.resources = resources or {}
+
+    @classmethod
+    def load(cls, path: str) -> "Fixture":
+        with open(path) as fp:
+            data = json.load(fp)
+        return cls(data.get("calls"), data.get("resources"))
+
+    def save(self, path: str):
+        with open(path, "w") as fp:
+            json.dump(
+                {"calls": self.calls, "resources": self.resources},
+                fp,
+                sort_keys=True,
+                indent=1,
+                default=str,
+            )
+            fp.write("\n")
+
+    def record_call(self, token: str, args: dict, result: dict):
+        self.calls[call_key(token, _known(args))] = _known(result)
+
+    def record_resource(
+        self, type_: str, name: str, id_: Optional[str], inputs: dict, outputs: dict
+    ):
+        # Only outputs the provider computed: replayed inputs would hide changes to the program.
+        computed = {k: v for k, v in outputs.items() if k not in inputs}
+        self.resources[resource_key(type_, name)] = {"id": id_ or None, "outputs": _known(computed)}
+
+
+class RecordingMocks(pulumi.runtime.Mocks):
+    """Records everything the wrapped mocks return into `fixture`."""
+
+    def __init__(self, inner: pulumi.runtime.Mocks, fixture: Fixture):
+        self.inner = inner
+        self.fixture = fixture
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        id_, outputs = self.inner.new_resource(args)
+        self.fixture.record_resource(args.typ, args.name, id_, args.inputs, outputs)
+        return [id_, outputs]
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        result = self.inner.call(args)
+        self.fixture.record_call(
+            args.token, args.args, result[0] if isinstance(result, tuple) else result
+        )
+        return result
+
+
+class RecordingMonitor:
+    """
+    Wraps the engine's resource monitor and records the results of the program's calls and the
+    outputs of its resources into `fixture`. Outputs that aren't known yet, as during a preview,
+    are left out.
+    """
+
+    def __init__(self, monitor, fixture: Fixture):
+        self._monitor = monitor
+        self._fixture = fixture
+
+    def __getattr__(self, name):
+        return getattr(self._monitor, name)
+
+    def Invoke(self, request, *args, **kwargs):
+        response = self._monitor.Invoke(request, *args, **kwargs)
+        if not response.failures:
+            self._fixture.record_call(
+                request.tok,
+                rpc.deserialize_properties(request.args),
+                rpc.deserialize_properties(getattr(response, "return")),
+            )
+        return response
+
+    def RegisterResource(self, request, *args, **kwargs):
+        response = self._monitor.RegisterResource(request, *args, **kwargs)
+        if request.type != "pulumi:pulumi:Stack":
+            self._fixture.record_resource(
+                request.type,
+                request.name,
+                response.id,
+                rpc.deserialize_properties(request.object),
+                rpc.deserialize_properties(response.object),
+            )
+        return response
+
+
+class ReplayMocks(pulumi.runtime.Mocks):
+    """
+    Serves the calls and resource outputs recorded in `fixture`.
+
+    A call that wasn't recorded with the same arguments fails, since its result can't be made
+    up. A resource that wasn't recorded gets its inputs as outputs, like any other mock.
+    """
+
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs):
+        recorded = self.fixture.resources.get(resource_key(args.typ, args.name), {})
+        return [
+            recorded.get("id") or f"{args.name}_id",
+            {**args.inputs, **recorded.get("outputs", {})},
+        ]
+
+    def call(self, args: pulumi.runtime.MockCallArgs):
+        key = call_key(args.token, args.args)
+        if key not in self.fixture.calls:
+            raise KeyError(f"no result recorded for {key}; re-record the fixture")
+        return self.fixture.calls[key]
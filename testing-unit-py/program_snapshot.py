@@ -0,0 +1,74 @@
+import runpy
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional, Tuple
+
+import pulumi
+
+
+class ResourceSnapshot(NamedTuple):
+    urn: str
+    type: str
+    name: str
+    id: Optional[str]
+    # The resource's resolved outputs, keyed by their engine (camelCase) names.
+    outputs: Mapping[str, Any]
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ProgramSnapshot:
+    """
+    The resources a Pulumi program registered under mocks, with their resolved outputs.
+
+    Everything in the snapshot is read-only (dicts are mapping proxies and lists are tuples), so
+    tests can share one snapshot without affecting each other.
+    """
+
+    def __init__(self, resources: Tuple[ResourceSnapshot, ...]):
+        self.resources = resources
+
+    def of_type(self, type_: str) -> Tuple[ResourceSnapshot, ...]:
+        return tuple(r for r in self.resources if r.type == type_)
+
+    def get(self, type_: str, name: str) -> ResourceSnapshot:
+        for resource in self.resources:
+            if resource.type == type_ and resource.name == name:
+                return resource
+        raise KeyError(f"the program registered no {type_} named {name}")
+
+
+def snapshot_program(path: str, mocks: pulumi.runtime.Mocks, **kwargs) -> ProgramSnapshot:
+    """
+    Run the program at `path` once under `mocks` and snapshot what it registered. Any other
+    arguments are passed to `pulumi.runtime.set_mocks`.
+
+    Call this once per test module (e.g. from `setUpModule`) instead of re-running the program
+    before every test.
+    """
+    pulumi.runtime.set_mocks(mocks, **kwargs)
+
+    @pulumi.runtime.test
+    def run():
+        runpy.run_path(path)
+
+    run()
+    registered = pulumi.runtime.settings.get_monitor().get_registered_resources()
+    resources = []
+    for urn, registration in registered.items():
+        qualified_type, name = urn.split("::", 3)[2:]
+        resources.append(
+            ResourceSnapshot(
+                urn,
+                qualified_type.split("$")[-1],
+                name,
+                registration.id,
+                _freeze(dict(registration.state or {})),
+            )
+        )
+    return ProgramSnapshot(tuple(resources))
@@ -0,0 +1,51 @@
+"""Record the fixture the unit tests replay from a real preview, or update, of the program.
+
+Runs `__main__.py` as an inline Automation API program against your AWS account and writes the
+results of its calls (e.g. `aws:ec2/getAmi:getAmi`) and the outputs its resources computed to
+`fixtures/test_ec2.json`. A preview only records calls, since outputs aren't known until the
+resources exist; `--up` creates the resources, records them and destroys them again.
+
+    python record_fixtures.py --region us-west-2 [--up]
+"""
+
+import argparse
+import runpy
+
+from pulumi import automation as auto
+from pulumi.runtime import settings
+
+from mock_fixtures import Fixture, RecordingMonitor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stack", default="record-fixtures")
+    parser.add_argument("--region", default="us-west-2")
+    parser.add_argument("--up", action="store_true", help="deploy to record computed outputs")
+    parser.add_argument("--out", default="fixtures/test_ec2.json")
+    args = parser.parse_args(argv)
+
+    fixture = Fixture()
+
+    def program():
+        settings.SETTINGS.monitor = RecordingMonitor(settings.get_monitor(), fixture)
+        runpy.run_path("__main__.py")
+
+    stack = auto.create_or_select_stack(
+        stack_name=args.stack, project_name="testing-unit-py", program=program
+    )
+    stack.set_config("aws:region", auto.ConfigValue(args.region))
+    if args.up:
+        try:
+            stack.up(on_output=print)
+        finally:
+            stack.destroy(on_output=print)
+    else:
+        stack.preview(on_output=print)
+
+    fixture.save(args.out)
+    print(f"recorded {len(fixture.calls)} calls and {len(fixture.resources)} resources")
+
+
+if __name__ == "__main__":
+    main()